@@ -0,0 +1,162 @@
+import asyncio
+import json
+import math
+import os
+import time
+
+from backend.metrics import register_collector, Counter, Gauge
+
+# Admission control / load shedding.
+# Each heavy endpoint gets its own concurrency limit and bounded wait queue, and all
+# other (light) routes share a separate gate, so saturating /simulate or /predict can
+# never use up the capacity reserved for quotes, history and news. Requests that can't
+# get a slot in time are answered immediately with 503 + Retry-After.
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def _env_float(name, default):
+    return float(os.environ.get(name, default))
+
+
+class Overloaded(Exception):
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionGate:
+    def __init__(self, name, limit, max_queue, queue_timeout):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self._cond = None
+        # Smoothed service time, used to suggest a Retry-After
+        self.avg_service = 1.0
+
+    def _condition(self):
+        # Created lazily so it binds to the running event loop
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    def retry_after(self):
+        backlog = (self.waiting + self.active) / max(1, self.limit)
+        return max(1, math.ceil(backlog * self.avg_service))
+
+    async def acquire(self):
+        cond = self._condition()
+        async with cond:
+            if self.active < self.limit:
+                self.active += 1
+                return
+            if self.waiting >= self.max_queue:
+                raise Overloaded("queue_full", self.retry_after())
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(cond.wait_for(lambda: self.active < self.limit), self.queue_timeout)
+            except asyncio.TimeoutError:
+                # A notify that raced with our timeout was meant for a waiter: pass it on,
+                # or the next queued request stays blocked while a slot is free
+                if self.active < self.limit:
+                    cond.notify()
+                raise Overloaded("queue_timeout", self.retry_after())
+            finally:
+                self.waiting -= 1
+            self.active += 1
+
+    async def release(self, service_time):
+        cond = self._condition()
+        async with cond:
+            self.active -= 1
+            self.avg_service = 0.8 * self.avg_service + 0.2 * service_time
+            cond.notify()
+
+
+# Heavy endpoints: (limit, max_queue, queue_timeout seconds); override with ADMISSION_<NAME>_* env vars
+HEAVY_ENDPOINTS = {
+    "/predict": (2, 4, 10.0),
+    "/predict/batch": (1, 2, 30.0),
+    "/simulate": (2, 4, 10.0),
+    "/backtest": (1, 2, 15.0),
+}
+LIGHT_LIMITS = (64, 256, 2.0)
+
+
+def _make_gate(name, defaults):
+    key = name.strip("/").replace("/", "_").upper()
+    limit, max_queue, timeout = defaults
+    return AdmissionGate(
+        name,
+        _env_int(f"ADMISSION_{key}_LIMIT", limit),
+        _env_int(f"ADMISSION_{key}_QUEUE", max_queue),
+        _env_float(f"ADMISSION_{key}_TIMEOUT", timeout),
+    )
+
+
+gates = {path: _make_gate(path, limits) for path, limits in HEAVY_ENDPOINTS.items()}
+light_gate = _make_gate("light", LIGHT_LIMITS)
+
+ADMISSION_REJECTED = Counter("stonks_admission_rejected_total", "Requests shed by admission control.", ["gate", "reason"])
+ADMISSION_ACTIVE = Gauge("stonks_admission_active", "Requests currently admitted.", ["gate"])
+ADMISSION_WAITING = Gauge("stonks_admission_waiting", "Requests waiting for admission.", ["gate"])
+
+
+@register_collector
+def _collect_admission():
+    for gate in list(gates.values()) + [light_gate]:
+        ADMISSION_ACTIVE.set(gate.active, gate=gate.name)
+        ADMISSION_WAITING.set(gate.waiting, gate=gate.name)
+
+
+def gate_for(path: str):
+    return gates.get(path.rstrip("/") or "/", light_gate)
+
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware (not BaseHTTPMiddleware) so the slot is held until the whole
+    response, including streamed bodies, has been sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        gate = gate_for(scope["path"])
+        try:
+            await gate.acquire()
+        except Overloaded as e:
+            ADMISSION_REJECTED.inc(gate=gate.name, reason=e.reason)
+            await self._reject(send, e)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await gate.release(time.perf_counter() - start)
+
+    @staticmethod
+    async def _reject(send, error):
+        body = json.dumps({"detail": "Server busy, retry later", "reason": error.reason}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(error.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
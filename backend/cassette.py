@@ -0,0 +1,91 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+# Record/replay layer for upstream provider calls (yfinance, Alpha Vantage, Finnhub,
+# Polygon, Google News RSS), so the data path can be benchmarked offline and deterministically.
+#   CASSETTE_MODE          off (default) | record | replay
+#   CASSETTE_DIR           where cassettes live (default ./cassettes), one gzipped JSON file per call
+#   CASSETTE_LATENCY_SCALE replay delay as a multiple of the recorded latency (1 = original, 0 = none)
+# Credentials (apikey / apiKey / token params) are never part of a cassette or its key.
+
+MODE = os.environ.get("CASSETTE_MODE", "off")
+CASSETTE_DIR = os.environ.get("CASSETTE_DIR", "cassettes")
+LATENCY_SCALE = float(os.environ.get("CASSETTE_LATENCY_SCALE", 1.0))
+
+FORMAT_VERSION = 1
+SECRET_PARAMS = {"apikey", "api_key", "token"}
+
+_write_lock = threading.Lock()
+
+
+class CassetteMiss(Exception):
+    pass
+
+
+def strip_secrets(params):
+    return {k: v for k, v in (params or {}).items() if k.lower() not in SECRET_PARAMS}
+
+
+def _path(provider, key):
+    digest = hashlib.sha1(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()[:24]
+    return os.path.join(CASSETTE_DIR, provider, f"{digest}.json.gz")
+
+
+def _encode(payload):
+    if isinstance(payload, pd.DataFrame):
+        return {"type": "frame", "value": payload.to_json(orient="table", date_format="iso")}
+    return {"type": "json", "value": payload}
+
+
+def _decode(entry):
+    if entry["type"] == "frame":
+        return pd.read_json(io.StringIO(entry["value"]), orient="table")
+    return entry["value"]
+
+
+def call(provider: str, key, fetch):
+    """
+    Run fetch() through the cassette layer.
+    Args:
+        provider: Cassette namespace, e.g. 'yahoo', 'alpha_vantage', 'google_news'
+        key: JSON-serializable request identity (no secrets)
+        fetch: Zero-argument callable doing the real upstream call; returns a DataFrame or JSON-able value
+    """
+    if MODE == "replay":
+        path = _path(provider, key)
+        if not os.path.exists(path):
+            raise CassetteMiss(f"No cassette for {provider} {key}")
+        with gzip.open(path, "rt") as f:
+            entry = json.load(f)
+        if LATENCY_SCALE > 0:
+            time.sleep(entry["elapsed"] * LATENCY_SCALE)
+        return _decode(entry["response"])
+
+    start = time.perf_counter()
+    payload = fetch()
+    elapsed = time.perf_counter() - start
+
+    if MODE == "record":
+        path = _path(provider, key)
+        entry = {
+            "version": FORMAT_VERSION,
+            "provider": provider,
+            "key": key,
+            "recorded_at": time.time(),
+            "elapsed": elapsed,
+            "response": _encode(payload),
+        }
+        with _write_lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.tmp"
+            with gzip.open(tmp, "wt") as f:
+                json.dump(entry, f, default=str)
+            os.replace(tmp, path)
+    return payload
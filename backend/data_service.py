@@ -1,20 +1,41 @@
-import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 import requests
 import os
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+import time
+import hashlib
+import weakref
 from cachetools import cached, TTLCache
+from backend.lazy import lazy_import
+from backend import stub_provider, cassette
+from backend.metrics import track_stage, timed_stage, register_collector, PROVIDER_REQUESTS, PROVIDER_ERRORS, CACHE_HITS, CACHE_MISSES, CACHE_SIZE
 
 # Setup Caching
 # Stock Data: 5 minutes TTL (300s)
 # News Data: 15 minutes TTL (900s)
 stock_cache = TTLCache(maxsize=100, ttl=300)
 news_cache = TTLCache(maxsize=100, ttl=900)
-
-analyzer = SentimentIntensityAnalyzer()
-
-@cached(stock_cache)
+# Quotes: 15 seconds TTL
+quote_cache = TTLCache(maxsize=500, ttl=15)
+# Histories pinned at server start (serve.warm_state): (ticker, period, api_source) -> (pinned_at, df).
+# Outside the TTL cache so forked workers keep sharing the parent's copy-on-write pages after
+# stock_cache expires; served for WARM_MAX_AGE seconds, then refetched like any other ticker.
+warm_frames = {}
+WARM_MAX_AGE = float(os.environ.get("WARM_MAX_AGE", 6 * 3600))
+
+# Heavy provider / NLP libraries load on first use to keep cold start fast
+yf = lazy_import("yfinance")
+vader = lazy_import("vaderSentiment.vaderSentiment")
+
+analyzer = None
+
+def get_analyzer():
+    global analyzer
+    if analyzer is None:
+        analyzer = vader.SentimentIntensityAnalyzer()
+    return analyzer
+
+@cached(stock_cache, info=True)
 def fetch_stock_data(ticker: str, period: str = "2y", api_source: str = "yahoo", api_key: str = None):
     """
     Fetches historical stock data for the given ticker.
@@ -26,55 +47,72 @@ def fetch_stock_data(ticker: str, period: str = "2y", api_source: str = "yahoo",
     Returns:
         DataFrame with Date and Close price.
     """
+    pinned = warm_frames.get((ticker, period, api_source))
+    if pinned and time.time() - pinned[0] < WARM_MAX_AGE:
+        return pinned[1]
+    PROVIDER_REQUESTS.inc(provider=api_source)
     try:
-        # Mock Data Logic
-        if api_source == "mock":
-            return generate_mock_data(ticker, period)
-
-        # Alpha Vantage
-        if api_source == "alpha_vantage":
-            # Fallback to environment variable if key not provided
-            key = api_key or os.environ.get("ALPHA_VANTAGE_KEY")
-            return fetch_alpha_vantage_data(ticker, period, key)
-
-        # Finnhub
-        if api_source == "finnhub":
-            return fetch_finnhub_data(ticker, period, api_key)
-
-        # Polygon.io
-        if api_source == "polygon":
-            return fetch_polygon_data(ticker, period, api_key)
-
-        # Default to Yahoo Finance
-        stock = yf.Ticker(ticker)
-        
-        # Enforce minimum period of 6mo for models (need 60 days look_back)
-        fetch_period = period
-        if period in ["1mo", "2mo", "3mo"]:
-            fetch_period = "6mo"
-            
-        # Fetch history
-        hist = stock.history(period=fetch_period)
-        
-        if hist.empty:
-            raise ValueError(f"No data found for ticker {ticker}")
-            
-        # Reset index to get Date as a column
-        hist = hist.reset_index()
-        
-        # Keep relevant columns for visualization and modeling
-        data = hist[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']]
-        
-        # Ensure Date is timezone naive or consistent
-        data['Date'] = pd.to_datetime(data['Date']).dt.tz_localize(None)
-        
-        # Add Technical Indicators
-        data = add_technical_indicators(data)
-        
-        return data
+        with track_stage("fetch_stock_data"):
+            return _fetch_from_provider(ticker, period, api_source, api_key)
     except Exception as e:
+        PROVIDER_ERRORS.inc(provider=api_source)
         raise ValueError(f"Error fetching data for {ticker}: {str(e)}")
 
+def pin_stock_data(ticker: str, period: str = "2y", api_source: str = "yahoo"):
+    """Fetch a history and keep it in warm_frames (see above). Returns the frame."""
+    data = fetch_stock_data(ticker, period=period, api_source=api_source)
+    warm_frames[(ticker, period, api_source)] = (time.time(), data)
+    return data
+
+def _fetch_from_provider(ticker: str, period: str, api_source: str, api_key: str):
+    # Local stub provider (load tests / offline runs) replaces every real source
+    if stub_provider.ENABLED or api_source == "stub":
+        return add_technical_indicators(stub_provider.fetch_history(ticker, period))
+
+    # Mock Data Logic
+    if api_source == "mock":
+        return generate_mock_data(ticker, period)
+
+    # Alpha Vantage
+    if api_source == "alpha_vantage":
+        # Fallback to environment variable if key not provided
+        key = api_key or os.environ.get("ALPHA_VANTAGE_KEY")
+        return fetch_alpha_vantage_data(ticker, period, key)
+
+    # Finnhub
+    if api_source == "finnhub":
+        return fetch_finnhub_data(ticker, period, api_key)
+
+    # Polygon.io
+    if api_source == "polygon":
+        return fetch_polygon_data(ticker, period, api_key)
+
+    # Default to Yahoo Finance
+    # Enforce minimum period of 6mo for models (need 60 days look_back)
+    fetch_period = period
+    if period in ["1mo", "2mo", "3mo"]:
+        fetch_period = "6mo"
+        
+    # Fetch history (reset index to get Date as a column)
+    hist = cassette.call(
+        "yahoo", ["history", ticker, fetch_period],
+        lambda: yf.Ticker(ticker).history(period=fetch_period).reset_index()
+    )
+    
+    if hist.empty:
+        raise ValueError(f"No data found for ticker {ticker}")
+    
+    # Keep relevant columns for visualization and modeling
+    data = hist[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']]
+    
+    # Ensure Date is timezone naive or consistent
+    data['Date'] = pd.to_datetime(data['Date']).dt.tz_localize(None)
+    
+    # Add Technical Indicators
+    data = add_technical_indicators(data)
+    
+    return data
+
 def generate_mock_data(ticker, period):
     import numpy as np
     # Simple random walk for testing
@@ -115,9 +153,7 @@ def fetch_alpha_vantage_data(ticker: str, period: str, api_key: str):
         'datatype': 'json'
     }
 
-    response = requests.get(url, params=params, timeout=10)
-    response.raise_for_status()
-    data = response.json()
+    data = get_json("alpha_vantage", ["daily", ticker, outputsize], url, params)
 
     if 'Error Message' in data:
         raise ValueError(f"Alpha Vantage error: {data['Error Message']}")
@@ -172,9 +208,7 @@ def fetch_finnhub_data(ticker: str, period: str, api_key: str):
         'token': api_key
     }
 
-    response = requests.get(url, params=params, timeout=10)
-    response.raise_for_status()
-    data = response.json()
+    data = get_json("finnhub", ["candle", ticker, period], url, params)
 
     if data.get('s') == 'no_data':
         raise ValueError(f"No data found for {ticker}")
@@ -213,9 +247,7 @@ def fetch_polygon_data(ticker: str, period: str, api_key: str):
         'apiKey': api_key
     }
 
-    response = requests.get(url, params=params, timeout=10)
-    response.raise_for_status()
-    data = response.json()
+    data = get_json("polygon", ["aggs", ticker, period], url, params)
 
     if data.get('status') != 'OK' or not data.get('results'):
         raise ValueError(f"No data found for {ticker}")
@@ -234,6 +266,17 @@ def fetch_polygon_data(ticker: str, period: str, api_key: str):
     df = df.sort_values('Date').reset_index(drop=True)
     return add_technical_indicators(df)
 
+def get_json(provider: str, key, url: str, params: dict):
+    """
+    GET a provider JSON endpoint through the cassette layer.
+    The cassette key is `key` plus the request params with credentials stripped.
+    """
+    def fetch():
+        response = requests.get(url, params=params, timeout=10)
+        response.raise_for_status()
+        return response.json()
+    return cassette.call(provider, [*key, cassette.strip_secrets(params)], fetch)
+
 def filter_by_period(df: pd.DataFrame, period: str):
     """Filter dataframe by period"""
     if period == 'max':
@@ -248,6 +291,7 @@ def filter_by_period(df: pd.DataFrame, period: str):
     cutoff_date = datetime.now() - timedelta(days=days)
     return df[df['Date'] >= cutoff_date].reset_index(drop=True)
 
+@timed_stage("add_technical_indicators")
 def add_technical_indicators(data):
     """
     Adds RSI, SMA, and EMA to the dataframe.
@@ -287,15 +331,74 @@ def add_technical_indicators(data):
     
     return df
 
+# id(df) -> version, dropped when the frame is garbage collected. Not df.attrs: pandas copies
+# attrs into slices and derived frames, which would then report their parent's version.
+_versions = {}
+
+def data_version(df: pd.DataFrame):
+    """
+    Content fingerprint of a fetched dataset, used as its cache version (ETag).
+    Computed once per DataFrame object and memoized by identity.
+    """
+    version = _versions.get(id(df))
+    if version is None:
+        hashed = pd.util.hash_pandas_object(df, index=False).values
+        version = hashlib.sha1(hashed.tobytes()).hexdigest()[:16]
+        _versions[id(df)] = version
+        weakref.finalize(df, _versions.pop, id(df), None)
+    return version
+
+def news_version(news_items):
+    """Fingerprint of a news list: changes only when a headline is added or removed."""
+    # url and title only: 'datetime' falls back to the fetch time for undated entries
+    keys = sorted(f"{item['url']}|{item['headline']}" for item in news_items)
+    return hashlib.sha1("\n".join(keys).encode()).hexdigest()[:16]
+
+@timed_stage("get_current_price")
 def get_current_price(ticker: str):
     try:
-        stock = yf.Ticker(ticker)
+        if stub_provider.ENABLED:
+            return stub_provider.current_price(ticker)
         # fast_info is often faster/more reliable for current price than history
-        return stock.fast_info.last_price
+        return cassette.call("yahoo", ["price", ticker], lambda: yf.Ticker(ticker).fast_info.last_price)
     except:
         return None
 
-@cached(news_cache)
+def _fast_info(ticker: str):
+    info = yf.Ticker(ticker).fast_info
+    return {"last_price": info.last_price, "previous_close": info.previous_close, "last_volume": info.last_volume}
+
+@cached(quote_cache, info=True)
+def get_batch_quotes(tickers: tuple):
+    """
+    Latest quote for each ticker (tickers must be a tuple so the call is cacheable).
+    Tickers that fail are left out of the result.
+    """
+    quotes = []
+    for ticker in tickers:
+        PROVIDER_REQUESTS.inc(provider="quotes")
+        try:
+            if stub_provider.ENABLED:
+                quotes.append(stub_provider.quote(ticker))
+                continue
+            info = cassette.call("yahoo", ["quote", ticker], lambda: _fast_info(ticker))
+            price = float(info["last_price"])
+            previous_close = float(info["previous_close"])
+            quotes.append({
+                "ticker": ticker,
+                "price": price,
+                "change": price - previous_close,
+                "change_percent": (price - previous_close) / previous_close * 100 if previous_close else 0,
+                "volume": float(info["last_volume"] or 0),
+                "previous_close": previous_close,
+                "timestamp": int(datetime.now().timestamp() * 1000)
+            })
+        except Exception as e:
+            PROVIDER_ERRORS.inc(provider="quotes")
+            print(f"Quote Error for {ticker}: {e}")
+    return quotes
+
+@cached(news_cache, info=True)
 def fetch_stock_news(ticker: str):
     """
     Fetches news for a given stock ticker using Google News RSS.
@@ -307,11 +410,21 @@ def fetch_stock_news(ticker: str):
     encoded_ticker = urllib.parse.quote(ticker)
     rss_url = f"https://news.google.com/rss/search?q={encoded_ticker}+stock&hl=en-US&gl=US&ceid=US:en"
     
-    feed = feedparser.parse(rss_url)
+    PROVIDER_REQUESTS.inc(provider="google_news")
+    with track_stage("fetch_stock_news"):
+        if stub_provider.ENABLED:
+            entries = stub_provider.news_entries(ticker)
+        else:
+            # Fetch the RSS ourselves (with a timeout) so it can be recorded / replayed
+            rss = cassette.call("google_news", ["rss", ticker], lambda: requests.get(rss_url, timeout=10).text)
+            feed = feedparser.parse(rss)
+            entries = feed.entries
+            if feed.get('bozo') and not entries:
+                PROVIDER_ERRORS.inc(provider="google_news")
     
     news_items = []
     
-    for entry in feed.entries:
+    for entry in entries:
         # Extract source from title if possible (Google News format: "Title - Source")
         title = entry.title
         source = "Google News"
@@ -330,7 +443,7 @@ def fetch_stock_news(ticker: str):
             timestamp = datetime.now().timestamp()
             
         # Sentiment Analysis
-        sentiment = analyzer.polarity_scores(title)
+        sentiment = get_analyzer().polarity_scores(title)
         compound = sentiment['compound']
         
         label = "Neutral"
@@ -350,3 +463,15 @@ def fetch_stock_news(ticker: str):
         })
         
     return news_items
+
+@register_collector
+def _collect_cache_stats():
+    for name, fn, cache in (
+        ("stock_cache", fetch_stock_data, stock_cache),
+        ("news_cache", fetch_stock_news, news_cache),
+        ("quote_cache", get_batch_quotes, quote_cache),
+    ):
+        info = fn.cache_info()
+        CACHE_HITS.set(info.hits, cache=name)
+        CACHE_MISSES.set(info.misses, cache=name)
+        CACHE_SIZE.set(len(cache), cache=name)
@@ -0,0 +1,69 @@
+import numpy as np
+
+# Response-side downsampling so payload size follows the client's screen
+# (point budget) instead of history length or simulation iteration count.
+
+
+def lttb_indices(y, threshold):
+    """
+    Largest-Triangle-Three-Buckets point selection.
+    Args:
+        y: 1-D sequence of values (x is taken as the sample index)
+        threshold: Target number of points to keep
+    Returns:
+        Sorted numpy array of indices into y. First and last points are always kept.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if threshold is None or threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=float)
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    # Interior points are split into (threshold - 2) buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+
+        # Average of the next bucket (or the last point for the final bucket)
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], max(edges[i + 2], edges[i + 1] + 1)
+            avg_x = x[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        # Pick the point forming the largest triangle with the previous pick and the next average
+        bx = x[start:end]
+        by = y[start:end]
+        area = np.abs((x[a] - avg_x) * (by - y[a]) - (x[a] - bx) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def subsample_paths(paths, max_paths):
+    """
+    Quantile-preserving subsampling of simulated price paths.
+    Paths are ranked by their final price and picked at evenly spaced ranks, so the
+    returned fan keeps the spread of the full distribution (tails included).
+    Args:
+        paths: Array-like of shape (iterations, days)
+        max_paths: Number of paths to keep
+    Returns:
+        numpy array of shape (min(iterations, max_paths), days)
+    """
+    paths = np.asarray(paths, dtype=float)
+    if paths.ndim != 2 or max_paths is None or max_paths >= len(paths):
+        return paths
+    if max_paths <= 0:
+        return paths[:0]
+
+    order = np.argsort(paths[:, -1], kind="stable")
+    ranks = np.linspace(0, len(paths) - 1, max_paths).round().astype(int)
+    return paths[order[ranks]]
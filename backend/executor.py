@@ -0,0 +1,89 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.metrics import register_collector, EXECUTOR_QUEUE_DEPTH, EXECUTOR_FREE_CORES
+
+# Shared executor for model training / prediction.
+# Threads (not processes) so every model reads the same in-memory DataFrame without
+# pickling it; sklearn's fit/predict inner loops release the GIL, so models still run
+# on separate cores. The pool is process-wide, and so is the core budget: every model takes
+# its n_jobs cores from core_budget and returns them when done, so concurrent requests
+# together never run more estimator threads than CPU_BUDGET.
+
+# Max cores model work may use at once (MODEL_CPU_BUDGET env var, defaults to all cores)
+CPU_BUDGET = int(os.environ.get("MODEL_CPU_BUDGET", 0)) or os.cpu_count() or 1
+
+model_executor = ThreadPoolExecutor(max_workers=CPU_BUDGET, thread_name_prefix="model")
+
+
+@register_collector
+def _collect_queue_depth():
+    EXECUTOR_QUEUE_DEPTH.set(model_executor._work_queue.qsize())
+
+
+class CoreBudget:
+    def __init__(self, total):
+        self.total = total
+        self.free = total
+        self._cond = threading.Condition()
+
+    def share(self, n_models: int):
+        """Cores each of n_models running side by side should ask for: the free cores, split."""
+        with self._cond:
+            return max(1, self.free // max(1, n_models))
+
+    def acquire(self, wanted: int):
+        """Take up to `wanted` cores (at least one), waiting until one is free. Returns the count."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.free > 0)
+            cores = max(1, min(wanted, self.free))
+            self.free -= cores
+            return cores
+
+    def release(self, cores: int):
+        with self._cond:
+            self.free += cores
+            self._cond.notify_all()
+
+
+core_budget = CoreBudget(CPU_BUDGET)
+
+
+@register_collector
+def _collect_free_cores():
+    EXECUTOR_FREE_CORES.set(core_budget.free)
+
+
+def _run_with_cores(run_model, name, wanted):
+    cores = core_budget.acquire(wanted)
+    try:
+        return run_model(name, cores)
+    finally:
+        core_budget.release(cores)
+
+
+def submit_with_cores(run_model, name, wanted: int):
+    """Schedule run_model(name, n_jobs) with n_jobs <= wanted cores taken from the process-wide budget."""
+    return submit_model(_run_with_cores, run_model, name, wanted)
+
+
+def submit_model(fn, *args, **kwargs):
+    """Schedule a blocking model call on the shared executor, returning an awaitable future."""
+    loop = asyncio.get_running_loop()
+    # Carry the request's context (trace spans) into the worker thread
+    ctx = contextvars.copy_context()
+    return loop.run_in_executor(model_executor, functools.partial(ctx.run, fn, *args, **kwargs))
+
+
+async def run_models(model_names, run_model):
+    """
+    Runs run_model(name, n_jobs) for every model in parallel.
+    Returns:
+        List of results in the same order as model_names.
+    """
+    wanted = core_budget.share(len(model_names))
+    return await asyncio.gather(*[submit_with_cores(run_model, name, wanted) for name in model_names])
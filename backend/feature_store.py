@@ -0,0 +1,111 @@
+import collections
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+from backend.metrics import register_collector, CACHE_HITS, CACHE_MISSES, CACHE_SIZE
+
+# Shared, read-only scaled feature matrices.
+# RandomForest, SVR, GradientBoosting (and every ensemble member) used to refit their own
+# MinMaxScaler and rescale the same frame. The store fits the scaler once per distinct
+# feature matrix and hands out the scaled array (read-only, per dtype); training windows are
+# zero-copy views over it (model.window_view), so any look_back shares the same entry.
+#   FEATURE_STORE_MB  memory budget for cached scaled arrays, default 128
+#
+# Entries are keyed by the content of the feature columns themselves (not by ticker or
+# df.attrs), so slices of a dataset (backtest splits, walk-forward folds) never collide.
+
+MEMORY_BYTES = int(float(os.environ.get("FEATURE_STORE_MB", 128)) * 1024 * 1024)
+
+
+class FeatureStore:
+    def __init__(self, memory_bytes=MEMORY_BYTES):
+        self.memory_bytes = memory_bytes
+        self._entries = collections.OrderedDict() # key -> {"scaler", "arrays": {dtype: array}}, most recent last
+        self._used = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(dataset, feature_columns):
+        digest = hashlib.sha1(np.ascontiguousarray(dataset).tobytes()).hexdigest()
+        return (digest, dataset.shape, tuple(feature_columns))
+
+    def _evict(self):
+        # Least recently used first; always keep the newest entry
+        while self._used > self.memory_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self._used -= sum(a.nbytes for a in entry["arrays"].values())
+
+    def scaled(self, data, feature_columns, dtype=np.float64):
+        """
+        Fitted scaler and scaled features for a frame.
+        Args:
+            data: Frame holding the feature columns
+            feature_columns: Columns to scale, in order
+            dtype: dtype of the returned array (the float64 array is always kept too)
+        Returns:
+            (scaler, scaled, scaled64): scaled in `dtype` and in float64, both read-only.
+            The scaler is shared, so callers must not refit it.
+        """
+        from sklearn.preprocessing import MinMaxScaler
+
+        dtype = np.dtype(dtype)
+        dataset = data[feature_columns].values
+        key = self._key(dataset, feature_columns)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if entry is None:
+            scaler = MinMaxScaler(feature_range=(0, 1))
+            scaled64 = scaler.fit_transform(dataset).astype(np.float64, copy=False)
+            scaled64.flags.writeable = False
+            entry = {"scaler": scaler, "arrays": {np.dtype(np.float64): scaled64}}
+            with self._lock:
+                # A concurrent miss may have stored it first; keep that one
+                if key in self._entries:
+                    entry = self._entries[key]
+                else:
+                    self._entries[key] = entry
+                    self._used += scaled64.nbytes
+                    self._evict()
+
+        arrays = entry["arrays"]
+        scaled = arrays.get(dtype)
+        if scaled is None:
+            scaled = arrays[np.dtype(np.float64)].astype(dtype)
+            scaled.flags.writeable = False
+            with self._lock:
+                existing = arrays.get(dtype)
+                if existing is not None:
+                    scaled = existing
+                else:
+                    arrays[dtype] = scaled
+                    if key in self._entries:
+                        self._used += scaled.nbytes
+                        self._evict()
+        return entry["scaler"], scaled, arrays[np.dtype(np.float64)]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._used = 0
+
+
+feature_store = FeatureStore()
+
+
+@register_collector
+def _collect_feature_store_stats():
+    CACHE_HITS.set(feature_store.hits, cache="feature_store")
+    CACHE_MISSES.set(feature_store.misses, cache="feature_store")
+    CACHE_SIZE.set(len(feature_store._entries), cache="feature_store")
@@ -0,0 +1,155 @@
+import copy
+import datetime
+import hashlib
+import os
+
+import numpy as np
+
+# Cross-ticker global model: one estimator trained on the windows of a whole universe instead
+# of one small model per ticker. Every ticker's features are min-max scaled on its own history
+# (feature store), so windows are comparable across price levels, and each window carries a
+# fixed embedding of its group (sector when known, otherwise the ticker) so the estimator can
+# still tell groups apart. Forecasts for the whole universe are one matrix-shaped predict per
+# step (recursive mode) or per forecast horizon (FORECAST_MODE=direct, see model.DirectForecaster).
+#   GLOBAL_MODEL_TYPE             base predictor whose estimator is trained, default random_forest
+#   GLOBAL_EMBEDDING_DIM          size of the group embedding, default 8
+#   GLOBAL_WINDOWS_PER_TICKER     most recent training windows kept per ticker, default 250
+
+MODEL_TYPE = os.environ.get("GLOBAL_MODEL_TYPE", "random_forest")
+EMBEDDING_DIM = int(os.environ.get("GLOBAL_EMBEDDING_DIM", 8))
+WINDOWS_PER_TICKER = int(os.environ.get("GLOBAL_WINDOWS_PER_TICKER", 250))
+
+
+def group_embedding(group: str, dim=EMBEDDING_DIM):
+    """Deterministic pseudo-random vector for a group name (a hashed, not learned, embedding)."""
+    seed = int(hashlib.sha1(group.upper().encode()).hexdigest()[:8], 16)
+    return np.random.default_rng(seed).standard_normal(dim)
+
+
+def universe_version(frames: dict):
+    """Fingerprint of a universe: its tickers and the data version of each frame."""
+    from backend.data_service import data_version
+
+    identity = ",".join(f"{ticker}:{data_version(frames[ticker])}" for ticker in sorted(frames))
+    return hashlib.sha1(identity.encode()).hexdigest()[:16]
+
+
+class GlobalModel:
+    def __init__(self, model_type=MODEL_TYPE, look_back=60, n_jobs=-1, params=None, groups=None,
+                 embedding_dim=EMBEDDING_DIM, windows_per_ticker=WINDOWS_PER_TICKER):
+        from backend.model import get_predictor
+
+        if model_type not in ("random_forest", "svr", "gradient_boosting"):
+            raise ValueError(f"Global model needs a sklearn predictor, got: {model_type}")
+        self.model_type = model_type
+        self.base = get_predictor(model_type, look_back=look_back, n_jobs=n_jobs, params=params)
+        self.look_back = look_back
+        self.n_jobs = n_jobs
+        self.groups = {t.upper(): g for t, g in (groups or {}).items()} # ticker -> sector
+        self.embedding_dim = embedding_dim
+        self.windows_per_ticker = windows_per_ticker
+        self.scalers = {} # ticker -> scaler fitted on that ticker's history
+        self.updates = 0
+
+    def with_cores(self, n_jobs):
+        """Shallow copy predicting with n_jobs cores (see BasePredictor.with_cores)."""
+        copied = copy.copy(self)
+        copied.n_jobs = n_jobs
+        copied.base = self.base.with_cores(n_jobs)
+        return copied
+
+    def hyperparameters(self):
+        return {
+            "base": self.base.hyperparameters(),
+            "groups": self.groups,
+            "embedding_dim": self.embedding_dim,
+            "windows_per_ticker": self.windows_per_ticker,
+        }
+
+    def embedding(self, ticker):
+        return group_embedding(self.groups.get(ticker.upper(), ticker), self.embedding_dim)
+
+    def _with_embedding(self, windows, ticker):
+        embedding = np.broadcast_to(self.embedding(ticker).astype(windows.dtype), (len(windows), self.embedding_dim))
+        return np.hstack([windows, embedding])
+
+    def train(self, frames: dict):
+        """
+        Fit one estimator on the pooled windows of every ticker.
+        Args:
+            frames: ticker -> frame with the predictor's feature columns
+        Returns:
+            Number of pooled training windows
+        """
+        base = self.base
+        horizon = base.forecast_horizon if base.direct else 1
+        xs, ys = [], []
+        for ticker, data in frames.items():
+            x_train, y_train, scaled_data = base.prepare_data_sklearn(data)
+            if len(y_train) <= horizon:
+                continue # Too short to contribute a full target; not forecast either
+            self.scalers[ticker.upper()] = base.scaler
+            if base.direct:
+                # Targets: the next `horizon` scaled Closes of each window (see BasePredictor.fit_estimator)
+                targets = np.lib.stride_tricks.sliding_window_view(scaled_data[self.look_back:, 0], horizon)
+            else:
+                targets = y_train
+            keep = min(len(targets), self.windows_per_ticker)
+            xs.append(self._with_embedding(x_train[len(targets) - keep:len(targets)], ticker))
+            ys.append(targets[-keep:])
+        if not xs:
+            raise ValueError("No ticker has enough history for the global model")
+
+        x, y = np.concatenate(xs), np.concatenate(ys)
+        if base.direct:
+            from backend.model import DirectForecaster, direct_horizons
+
+            horizons = direct_horizons(horizon, base.native_multioutput)
+            base.model = DirectForecaster(base.build_estimator(len(y)), horizons, base.native_multioutput, self.n_jobs)
+            base.model.fit(x, y[:, np.asarray(horizons) - 1])
+        else:
+            base.model = base.build_estimator(len(y))
+            base.model.fit(x, y)
+        return len(y)
+
+    def predict_future(self, frames: dict, days=30):
+        """
+        Forecast every ticker in one batch per step (or per horizon block in direct mode).
+        Returns:
+            ticker -> (future_dates, predicted_prices), for the tickers the model was trained on
+        """
+        from backend.model import DirectForecaster, IndicatorState
+
+        base = self.base
+        tickers = [t for t in frames if t.upper() in self.scalers]
+        scalers = [self.scalers[t.upper()] for t in tickers]
+        windows = [s.transform(frames[t][base.feature_columns].values[-self.look_back:]) for t, s in zip(tickers, scalers)]
+        indicators = [IndicatorState(frames[t], base.feature_columns, base.rsi_loss_floor) for t in tickers]
+        embeddings = np.array([self.embedding(t) for t in tickers]).reshape(len(tickers), self.embedding_dim)
+        direct = isinstance(base.model, DirectForecaster)
+        predicted = np.empty((len(tickers), days))
+
+        done = 0
+        while done < days and tickers:
+            x = np.hstack([np.array([w.reshape(-1) for w in windows]), embeddings])
+            if direct:
+                block = min(days - done, base.model.max_horizon)
+                paths = base.model.predict_path(x, block)
+            else:
+                block = 1
+                paths = base.model.predict(x).reshape(-1, 1)
+            for i, scaler in enumerate(scalers):
+                scale, offset = scaler.scale_, scaler.min_
+                prices = (paths[i] - offset[0]) / scale[0]
+                predicted[i, done:done + block] = prices
+                if done + block < days:
+                    rows = [indicators[i].push(price) * scale + offset for price in prices]
+                    windows[i] = np.vstack([windows[i], rows])[-self.look_back:]
+            done += block
+
+        forecasts = {}
+        for i, ticker in enumerate(tickers):
+            last_date = frames[ticker]['Date'].iloc[-1]
+            future_dates = [last_date + datetime.timedelta(days=d + 1) for d in range(days)]
+            forecasts[ticker] = (future_dates, predicted[i])
+        return forecasts
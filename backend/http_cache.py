@@ -0,0 +1,37 @@
+import hashlib
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+# Conditional GET support: responses carry an ETag derived from the version of the
+# cached dataset they were built from, and a matching If-None-Match gets an empty 304.
+
+# Stock data is cached for 5 minutes, news for 15 (see data_service)
+HISTORY_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=240"
+NEWS_CACHE_CONTROL = "public, max-age=300, stale-while-revalidate=600"
+
+
+def make_etag(*parts):
+    """Strong ETag from a dataset version plus any request parameters that shape the body."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return "*" in candidates or etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+
+def conditional_json(request: Request, etag: str, cache_control: str, build_body):
+    """
+    Returns 304 Not Modified if the client already has this version, otherwise the JSON body.
+    build_body is only called on a miss, so a 304 skips serialization entirely.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(build_body(), headers=headers)
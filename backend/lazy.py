@@ -0,0 +1,63 @@
+import importlib
+import threading
+import time
+import types
+
+# Deferred imports for heavy dependencies (sklearn, scipy, yfinance, vaderSentiment, ...).
+# A LazyModule stands in for the real module and imports it on first attribute access,
+# so the server can answer /health before any of them are loaded. Import costs are
+# recorded for the startup report.
+
+# module name -> seconds spent importing it
+IMPORT_TIMES = {}
+_lock = threading.RLock()
+
+
+class LazyModule(types.ModuleType):
+    def __init__(self, name):
+        super().__init__(name)
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with _lock:
+                if self._module is None:
+                    self._module = timed_import(self.__name__)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+def lazy_import(name: str):
+    """Returns a proxy for module `name` that is imported on first use."""
+    return LazyModule(name)
+
+
+def timed_import(name: str):
+    """Import a module now, recording how long it took."""
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    IMPORT_TIMES.setdefault(name, time.perf_counter() - start)
+    return module
+
+
+def preload(names):
+    """Import modules in a background thread (warm-up after the server is already answering)."""
+    def run():
+        for name in names:
+            try:
+                timed_import(name)
+            except Exception as e:
+                print(f"Preload of {name} failed: {e}")
+    thread = threading.Thread(target=run, name="preload", daemon=True)
+    thread.start()
+    return thread
+
+
+def startup_report():
+    """Import cost per module, slowest first."""
+    return [
+        {"module": name, "seconds": round(seconds, 4)}
+        for name, seconds in sorted(IMPORT_TIMES.items(), key=lambda item: item[1], reverse=True)
+    ]
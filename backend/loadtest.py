@@ -0,0 +1,238 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+# Reproducible API load test.
+# Starts the FastAPI app in-process against the local stub provider (see stub_provider.py),
+# drives a weighted mix of endpoints from concurrent clients, and writes throughput and
+# p50/p95/p99 latency per endpoint as JSON, so runs before and after a change can be diffed.
+#
+#   python -m backend.loadtest --duration 60 --concurrency 16 --latency-ms 80 --output baseline.json
+#   python -m backend.loadtest --compare baseline.json
+#
+# Pass --url to drive an already running server instead (it should run with STUB_PROVIDER=1),
+# or --cassette-dir to replay recorded real provider responses (CASSETTE_MODE=record to capture them).
+
+DEFAULT_MIX = "history=35,quotes=20,news=15,predict=10,simulate=10,backtest=10"
+TICKERS = ["AAPL", "MSFT", "NVDA", "AMZN", "GOOG", "META", "TSLA", "SPY", "QQQ", "JPM"]
+
+
+def build_request(endpoint: str, rng: random.Random):
+    """(method, path, json body) for one request of the given kind."""
+    ticker = rng.choice(TICKERS)
+    if endpoint == "history":
+        return "POST", "/history", {"ticker": ticker, "period": rng.choice(["6mo", "1y", "2y"])}
+    if endpoint == "quotes":
+        return "POST", "/quotes", {"tickers": rng.sample(TICKERS, 5)}
+    if endpoint == "news":
+        return "GET", f"/news/{ticker}", None
+    if endpoint == "predict":
+        return "POST", "/predict", {"ticker": ticker, "days": 30, "model_type": rng.choice(["random_forest", "gradient_boosting", "monte_carlo"])}
+    if endpoint == "simulate":
+        return "POST", "/simulate", {"ticker": ticker, "days": 30, "simulation_method": rng.choice(["gbm", "heston", "bootstrapping"])}
+    if endpoint == "backtest":
+        return "POST", "/backtest", {"ticker": ticker, "model_type": "monte_carlo"}
+    raise ValueError(f"Unknown endpoint: {endpoint}")
+
+
+def parse_mix(mix: str):
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def percentile(sorted_values, q):
+    # Nearest-rank percentile
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples, elapsed):
+    """samples: endpoint -> list of (latency_seconds, status)."""
+    report = {}
+    for endpoint, items in sorted(samples.items()):
+        ok = sorted(latency * 1000 for latency, status in items if status < 400)
+        report[endpoint] = {
+            "requests": len(items),
+            "ok": len(ok),
+            "shed_503": sum(1 for _, status in items if status == 503),
+            "errors": sum(1 for _, status in items if status >= 400 and status != 503),
+            "throughput_rps": round(len(ok) / elapsed, 3),
+            "p50_ms": _round(percentile(ok, 50)),
+            "p95_ms": _round(percentile(ok, 95)),
+            "p99_ms": _round(percentile(ok, 99)),
+            "mean_ms": _round(sum(ok) / len(ok)) if ok else None,
+            "max_ms": _round(ok[-1]) if ok else None,
+        }
+    return report
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
+
+
+async def drive(base_url, weights, duration, concurrency, seed):
+    import httpx
+
+    samples = {name: [] for name in weights}
+    names = list(weights)
+    deadline = time.monotonic() + duration
+
+    async def client_loop(worker_id):
+        rng = random.Random(seed * 1000 + worker_id)
+        async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+            while time.monotonic() < deadline:
+                endpoint = rng.choices(names, weights=[weights[n] for n in names])[0]
+                method, path, body = build_request(endpoint, rng)
+                start = time.perf_counter()
+                try:
+                    resp = await client.request(method, path, json=body)
+                    status = resp.status_code
+                except httpx.HTTPError:
+                    status = 599
+                samples[endpoint].append((time.perf_counter() - start, status))
+
+    started = time.monotonic()
+    await asyncio.gather(*[client_loop(i) for i in range(concurrency)])
+    return samples, time.monotonic() - started
+
+
+def start_local_server(args):
+    # The stub / cassettes must be configured before the app (and data_service) is imported
+    if args.cassette_dir:
+        # Replay recorded provider responses through the real data path
+        os.environ["CASSETTE_MODE"] = "replay"
+        os.environ["CASSETTE_DIR"] = args.cassette_dir
+        os.environ["CASSETTE_LATENCY_SCALE"] = str(args.latency_scale)
+    else:
+        os.environ["STUB_PROVIDER"] = "1"
+        os.environ["STUB_LATENCY_MS"] = str(args.latency_ms)
+        os.environ["STUB_ERROR_RATE"] = str(args.error_rate)
+        if args.data_dir:
+            os.environ["STUB_DATA_DIR"] = args.data_dir
+
+    import uvicorn
+    from backend.main import app
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def print_report(report, baseline=None):
+    header = f"{'endpoint':<10} {'reqs':>6} {'ok':>6} {'503':>5} {'err':>5} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, r in report["endpoints"].items():
+        line = (f"{endpoint:<10} {r['requests']:>6} {r['ok']:>6} {r['shed_503']:>5} {r['errors']:>5} "
+                f"{r['throughput_rps']:>8.2f} {_fmt(r['p50_ms']):>9} {_fmt(r['p95_ms']):>9} {_fmt(r['p99_ms']):>9}")
+        print(line)
+        base = (baseline or {}).get("endpoints", {}).get(endpoint)
+        if base:
+            deltas = [_delta(r[k], base[k]) for k in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")]
+            print(f"{'  vs base':<10} {'':>6} {'':>6} {'':>5} {'':>5} {deltas[0]:>8} {deltas[1]:>9} {deltas[2]:>9} {deltas[3]:>9}")
+
+
+def _fmt(value):
+    return "-" if value is None else f"{value:.1f}"
+
+
+def _delta(current, base):
+    if current is None or not base:
+        return "-"
+    return f"{(current - base) / base * 100:+.0f}%"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the API against the stub market-data provider")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="endpoint weights, e.g. history=50,predict=10")
+    parser.add_argument("--latency-ms", type=float, default=50, help="mean stub upstream latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stub upstream error probability")
+    parser.add_argument("--data-dir", help="directory of recorded <TICKER>.csv bars for the stub")
+    parser.add_argument("--cassette-dir", help="replay recorded provider cassettes (see cassette.py) instead of the stub")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="cassette replay latency multiplier")
+    parser.add_argument("--seed", type=int, default=1207)
+    parser.add_argument("--url", help="target an already running server instead of starting one")
+    parser.add_argument("--output", default="loadtest_report.json")
+    parser.add_argument("--compare", help="baseline report to compare against")
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    weights = parse_mix(args.mix)
+    server = None
+    base_url = args.url
+    if not base_url:
+        server, base_url = start_local_server(args)
+
+    try:
+        samples, elapsed = asyncio.run(drive(base_url, weights, args.duration, args.concurrency, args.seed))
+    finally:
+        if server is not None:
+            server.should_exit = True
+
+    endpoints = summarize(samples, elapsed)
+    total_ok = sum(r["ok"] for r in endpoints.values())
+    report = {
+        "config": {
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "mix": weights,
+            "stub_latency_ms": args.latency_ms,
+            "stub_error_rate": args.error_rate,
+            "seed": args.seed,
+            "target": args.url or "in-process",
+            "provider": f"cassettes:{args.cassette_dir}" if args.cassette_dir else "stub",
+        },
+        "environment": {
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "elapsed_s": round(elapsed, 3),
+        "total_throughput_rps": round(total_ok / elapsed, 3),
+        "endpoints": endpoints,
+    }
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    print(f"\nTotal: {report['total_throughput_rps']} req/s over {report['elapsed_s']}s -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
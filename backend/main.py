@@ -1,30 +1,97 @@
-from fastapi import FastAPI, HTTPException
+import time
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, PlainTextResponse, JSONResponse
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
 from fastapi.middleware.cors import CORSMiddleware
 import pandas as pd
 import numpy as np
-from backend.data_service import fetch_stock_data, get_current_price, fetch_stock_news, get_batch_quotes
-from backend.model import get_predictor
+from backend.data_service import fetch_stock_data, get_current_price, fetch_stock_news, get_batch_quotes, data_version, news_version
+from backend.lazy import lazy_import, preload, startup_report, IMPORT_TIMES
+from backend.downsample import lttb_indices, subsample_paths
+from backend.streaming import stream_model_results, stream_jobs
+from backend.executor import run_models, submit_model, submit_with_cores, core_budget
+from backend.yahoo_proxy import yahoo_proxy, UpstreamError
+from backend.tracing import start_trace
+from backend.metrics import track_stage, timed_stage, render_metrics, REQUEST_SECONDS
+from backend.admission import AdmissionMiddleware
+from backend.model_registry import model_registry
+from backend.tuning import tuning_service
+from backend.walk_forward import walk_forward_backtest
+from backend.global_model import GlobalModel, universe_version
+from backend.http_cache import make_etag, conditional_json, HISTORY_CACHE_CONTROL, NEWS_CACHE_CONTROL
 import traceback
 import os
 import datetime
+import asyncio
+from starlette.concurrency import run_in_threadpool
+
+# backend.model pulls in sklearn / scipy: loaded on the first model request, not at boot
+_model = lazy_import("backend.model")
+
+def get_predictor(model_type: str, **kwargs):
+    return _model.get_predictor(model_type, **kwargs)
 
 app = FastAPI()
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template (not raw path) to keep cardinality bounded
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        REQUEST_SECONDS.observe(time.perf_counter() - start, method=request.method, endpoint=endpoint, status=status)
+
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    # One trace per request; its spans become the Server-Timing header
+    with start_trace(f"{request.method} {request.url.path}") as trace:
+        response = await call_next(request)
+    response.headers["Server-Timing"] = trace.server_timing()
+    return response
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # Proxy for Yahoo Finance (for Market Overview & Trending service)
-import requests
 @app.get("/api/yahoo/{path:path}")
-def proxy_yahoo(path: str):
-    url = f"https://query1.finance.yahoo.com/{path}"
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"}
+async def proxy_yahoo(path: str, http_request: Request):
     try:
-        resp = requests.get(url, headers=headers)
-        return resp.json()
-    except Exception as e:
+        status, payload = await yahoo_proxy.get(path, http_request.url.query)
+        return JSONResponse(payload, status_code=status)
+    except UpstreamError as e:
         print(f"Proxy Error: {e}")
-        raise HTTPException(status_code=500, detail="Proxy failed")
+        raise HTTPException(status_code=502, detail="Proxy failed")
+
+@app.on_event("shutdown")
+async def close_yahoo_proxy():
+    await yahoo_proxy.close()
+
+@app.on_event("startup")
+async def report_startup():
+    for item in startup_report():
+        print(f"import {item['module']}: {item['seconds'] * 1000:.0f} ms")
+    # Optionally warm the heavy modules in the background once we are already serving
+    if os.environ.get("PRELOAD_MODULES", "0") == "1":
+        preload(["backend.model", "yfinance", "vaderSentiment.vaderSentiment"])
+
+@app.get("/tuning/{ticker}")
+async def tuning_status(ticker: str):
+    return tuning_service.status(ticker)
+
+@app.get("/startup")
+async def startup_info():
+    return {"imports": startup_report()}
 
 @app.get("/health")
 async def health_check():
@@ -36,6 +103,9 @@ async def health_check():
 
 # Removed static file mounting - frontend deployed separately
 
+# Per-endpoint concurrency limits and load shedding (added before CORS so 503s still carry CORS headers)
+app.add_middleware(AdmissionMiddleware)
+
 # Enable CORS
 app.add_middleware(
     CORSMiddleware,
@@ -50,6 +120,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing", "Retry-After"],
 )
 
 class PredictionRequest(BaseModel):
@@ -65,6 +136,13 @@ class PredictionRequest(BaseModel):
     commission: float = 0.001 # 0.1% transaction cost
     drift_adj: float = 0.0 # Percentage to add/subtract from drift (e.g. 0.05 for +5%)
     volatility_adj: float = 0.0 # Multiplier (e.g. 1.2 for 20% higher vol from historical)
+    max_points: int = None # Point budget per series (e.g. chart width in pixels)
+    max_paths: int = 100 # Number of simulation paths returned for visualization
+    # "ndjson" or "sse": emit each model's result as soon as it is ready (anything else is rejected)
+    stream: Optional[Literal["ndjson", "sse"]] = None
+    backtest_mode: Literal["split", "expanding", "rolling"] = "split" # "split" (single 80/20), or walk-forward
+    retrain_every: int = Field(20, ge=1) # Walk-forward: bars per fold between retrains
+    train_window: Optional[int] = Field(None, ge=1) # Rolling walk-forward: training rows per fold
 
 
 
@@ -79,8 +157,11 @@ async def read_root():
             "history": "/history",
             "news": "/news/{ticker}",
             "predict": "/predict",
+            "predict_batch": "/predict/batch",
             "simulate": "/simulate",
-            "backtest": "/backtest"
+            "backtest": "/backtest",
+            "tuning": "/tuning/{ticker}",
+            "metrics": "/metrics"
         }
     }
 
@@ -89,130 +170,184 @@ class HistoryRequest(BaseModel):
     period: str = "2y"
     api_source: str = "yahoo"
     api_key: str = None
+    max_points: int = None # Point budget (e.g. chart width in pixels), LTTB on Close
 
-@app.post("/history")
-async def get_history(request: HistoryRequest):
+def history_response(http_request: Request, ticker: str, period: str, api_source: str, api_key: str = None, max_points: int = None):
     try:
-        data = fetch_stock_data(request.ticker, period=request.period, api_source=request.api_source, api_key=request.api_key)
-        
-        # Minimize payload, we only need date and close for comparison
-        historical_data = []
-        for index, row in data.iterrows():
-            historical_data.append({
-                "date": row['Date'].isoformat(),
-                "open": float(row['Open']),
-                "high": float(row['High']),
-                "low": float(row['Low']),
-                "close": float(row['Close']),
-                "volume": float(row['Volume'])
-            })
+        data = fetch_stock_data(ticker, period=period, api_source=api_source, api_key=api_key)
+        etag = make_etag(data_version(data), ticker, period, max_points)
+        
+        @timed_stage("serialize")
+        def build_body():
+            rows = data
+            # Downsample to the client's point budget
+            if max_points:
+                rows = data.iloc[lttb_indices(data['Close'].values, max_points)]
             
-        return {
-            "ticker": request.ticker,
-            "period": request.period,
-            "history": historical_data
-        }
+            # Minimize payload, we only need date and close for comparison
+            historical_data = []
+            for index, row in rows.iterrows():
+                historical_data.append({
+                    "date": row['Date'].isoformat(),
+                    "open": float(row['Open']),
+                    "high": float(row['High']),
+                    "low": float(row['Low']),
+                    "close": float(row['Close']),
+                    "volume": float(row['Volume'])
+                })
+                
+            return {
+                "ticker": ticker,
+                "period": period,
+                "history": historical_data
+            }
+            
+        return conditional_json(http_request, etag, HISTORY_CACHE_CONTROL, build_body)
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/history")
+async def get_history(request: HistoryRequest, http_request: Request):
+    return await run_in_threadpool(history_response, http_request, request.ticker, request.period, request.api_source, request.api_key, request.max_points)
+
+# GET variant so browser and CDN caches can store and revalidate history
+@app.get("/history/{ticker}")
+async def get_history_cached(ticker: str, http_request: Request, period: str = "2y", api_source: str = "yahoo", max_points: int = None):
+    return await run_in_threadpool(history_response, http_request, ticker, period, api_source, max_points=max_points)
+
 
 @app.post("/quotes")
 async def get_quotes(request: dict):
     tickers = request.get("tickers", [])
     if not tickers:
         return []
-    return get_batch_quotes(tuple(tickers))
+    return await run_in_threadpool(get_batch_quotes, tuple(tickers))
 
 @app.get("/quote/{ticker}")
 async def get_quote(ticker: str):
-    data = get_batch_quotes(tuple([ticker]))
+    data = await run_in_threadpool(get_batch_quotes, tuple([ticker]))
     if data:
         return data[0]
     raise HTTPException(status_code=404, detail="Quote not found")
 
 @app.get("/news/{ticker}")
-async def get_news(ticker: str):
+async def get_news(ticker: str, http_request: Request):
     try:
-        news_items = fetch_stock_news(ticker)
-        return {"ticker": ticker, "news": news_items}
+        news_items = await run_in_threadpool(fetch_stock_news, ticker)
+        etag = make_etag(news_version(news_items), ticker)
+        return conditional_json(http_request, etag, NEWS_CACHE_CONTROL, lambda: {"ticker": ticker, "news": news_items})
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+def select_models(model_type: str):
+    # Resolve the model names to run for a request's model_type
+    if model_type == "all":
+        return ["random_forest", "svr", "gradient_boosting", "monte_carlo"]
+    if model_type == "lstm":
+        return ["random_forest"] # Fallback
+    return [model_type]
+
+@timed_stage("serialize")
+def historical_records(data):
+    # Convert timestamps to ISO strings
+    historical_data = []
+    for index, row in data.iterrows():
+        item = {
+            "date": row['Date'].isoformat(),
+            "open": float(row['Open']),
+            "high": float(row['High']),
+            "low": float(row['Low']),
+            "close": float(row['Close']),
+            "volume": float(row['Volume']),
+            "sma_20": float(row['SMA_20']),
+            "sma_50": float(row['SMA_50']),
+            "rsi": float(row['RSI']),
+            "macd": float(row['MACD']),
+            "signal_line": float(row['Signal_Line']),
+            "upper_band": float(row['Upper_Band']),
+            "lower_band": float(row['Lower_Band'])
+        }
+        historical_data.append(item)
+    return historical_data
+
+def train_loss(history):
+    return float(history.history['loss'][-1]) if history and 'loss' in history.history else 0
+
+def run_prediction(ticker: str, model_name: str, data, days: int, n_jobs: int = -1):
+    # Train on all available data, or reuse the model already fitted on this exact dataset
+    def train(predictor):
+        with track_stage("train", model_name):
+            history, scaled_data = predictor.train(data, epochs=20)
+        return train_loss(history)
+
+    # Parameters found by the background search, once there are any
+    params = tuning_service.best_params(ticker, model_name)
+    predictor, meta = model_registry.get_or_train(
+        ticker, model_name, data_version(data),
+        lambda: get_predictor(model_name, n_jobs=n_jobs, params=params), train, data=data
+    )
+    
+    # Predict Future
+    with track_stage("predict_future", model_name):
+        future_dates, future_prices = predictor.predict_future(data, days=days)
+    
+    predictions = []
+    for date, price in zip(future_dates, future_prices):
+        predictions.append({
+            "date": date.isoformat(),
+            "price": float(price)
+        })
+        
+    tuning_service.schedule(ticker, model_name, data)
+    return {
+        "model": model_name,
+        "predictions": predictions,
+        "metrics": {
+            "loss": meta.get("loss") or 0
+        }
+    }
+
 @app.post("/predict")
 async def predict(request: PredictionRequest):
     try:
         # 1. Fetch Data
-        data = fetch_stock_data(request.ticker, period=request.period, api_source=request.api_source)
+        # Provider calls block: keep them off the event loop so cheap endpoints stay responsive
+        data = await run_in_threadpool(fetch_stock_data, request.ticker, period=request.period, api_source=request.api_source)
         
         # 2. Train Models to run
-        models_to_run = []
-        if request.model_type == "all":
-            models_to_run = ["random_forest", "svr", "gradient_boosting", "monte_carlo"]
-        else:
-            if request.model_type == "lstm":
-                 models_to_run = ["random_forest"] # Fallback
-            else:
-                 models_to_run = [request.model_type]
+        models_to_run = select_models(request.model_type)
             
         if request.run_simulation:
             if "monte_carlo" not in models_to_run:
                 models_to_run.append("monte_carlo")
-            
-        results = []
-        
-        for model_name in models_to_run:
-            # Train Model
-            predictor = get_predictor(model_name)
-            # Train on all available data
-            history, scaled_data = predictor.train(data, epochs=20) 
-            
-            # Predict Future
-            future_dates, future_prices = predictor.predict_future(data, days=request.days)
-            
-            predictions = []
-            for date, price in zip(future_dates, future_prices):
-                predictions.append({
-                    "date": date.isoformat(),
-                    "price": float(price)
-                })
                 
-            results.append({
-                "model": model_name,
-                "predictions": predictions,
-                "metrics": {
-                    "loss": float(history.history['loss'][-1]) if history and 'loss' in history.history else 0
-                }
-            })
+        if request.stream:
+            return stream_model_results(
+                models_to_run,
+                lambda model_name, n_jobs: run_prediction(request.ticker, model_name, data, request.days, n_jobs),
+                lambda results: {
+                    "ticker": request.ticker,
+                    "current_price": get_current_price(request.ticker),
+                    "historical": historical_records(data.iloc[-45:])
+                },
+                fmt=request.stream
+            )
+            
+        # Models are independent: train them side by side within the CPU budget
+        results = await run_models(
+            models_to_run,
+            lambda model_name, n_jobs: run_prediction(request.ticker, model_name, data, request.days, n_jobs)
+        )
         
         # 4. Prepare Response
-        # Convert timestamps to ISO strings
-        historical_data = []
-        for index, row in data.iterrows():
-            item = {
-                "date": row['Date'].isoformat(),
-                "open": float(row['Open']),
-                "high": float(row['High']),
-                "low": float(row['Low']),
-                "close": float(row['Close']),
-                "volume": float(row['Volume']),
-                "sma_20": float(row['SMA_20']),
-                "sma_50": float(row['SMA_50']),
-                "rsi": float(row['RSI']),
-                "macd": float(row['MACD']),
-                "signal_line": float(row['Signal_Line']),
-                "upper_band": float(row['Upper_Band']),
-                "lower_band": float(row['Lower_Band'])
-            }
-            historical_data.append(item)
-            
-        current_price = get_current_price(request.ticker)
+        current_price = await run_in_threadpool(get_current_price, request.ticker)
         
         return {
             "ticker": request.ticker,
             "current_price": current_price,
-            "historical": historical_data[-45:], # Return last 45 days (Zoomed In)
+            "historical": historical_records(data.iloc[-45:]), # Return last 45 days (Zoomed In)
             "results": results
         }
         
@@ -220,53 +355,147 @@ async def predict(request: PredictionRequest):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+class BatchPredictionRequest(BaseModel):
+    tickers: list[str]
+    days: int = 30
+    model_type: str = "random_forest"
+    period: str = "2y"
+    api_source: str = "yahoo"
+    stream: Optional[Literal["ndjson", "sse"]] = "ndjson" # or None for one JSON body at the end
+    global_model: bool = False # One model pooled across all tickers (one JSON body, not streamed)
+    sectors: dict[str, str] = None # Global model: ticker -> sector, shared embedding per sector
+
+# Limit concurrent provider fetches so a large universe doesn't get us rate limited
+BATCH_FETCH_CONCURRENCY = int(os.environ.get("BATCH_FETCH_CONCURRENCY", 8))
+
+async def predict_ticker(ticker: str, request: BatchPredictionRequest, fetch_slots: asyncio.Semaphore):
+    # Fetch on the I/O threadpool, then train/forecast on the model executor.
+    # Parallelism is across tickers, so each model gets a single core.
+    async with fetch_slots:
+        data = await run_in_threadpool(fetch_stock_data, ticker, period=request.period, api_source=request.api_source)
+    results = await asyncio.gather(*[
+        submit_with_cores(lambda name, n_jobs: run_prediction(ticker, name, data, request.days, n_jobs), model_name, 1)
+        for model_name in select_models(request.model_type)
+    ])
+    return {
+        "ticker": ticker,
+        "last_close": float(data['Close'].iloc[-1]),
+        "results": results
+    }
+
+def run_global_prediction(frames: dict, request: BatchPredictionRequest, n_jobs: int = -1):
+    # One training job for the universe (cached like per-ticker models), one batched forecast
+    model_type = request.model_type if request.model_type in ("random_forest", "svr", "gradient_boosting") else None
+    model_name = f"global_{model_type or 'default'}"
+
+    def build():
+        if model_type:
+            return GlobalModel(model_type, n_jobs=n_jobs, groups=request.sectors)
+        return GlobalModel(n_jobs=n_jobs, groups=request.sectors)
+
+    def train(model):
+        with track_stage("train", model_name):
+            model.train(frames)
+        return 0
+
+    model, meta = model_registry.get_or_train("*", model_name, universe_version(frames), build, train)
+    with track_stage("predict_future", model_name):
+        forecasts = model.predict_future(frames, days=request.days)
+    return [{
+        "ticker": ticker,
+        "last_close": float(frames[ticker]['Close'].iloc[-1]),
+        "results": [{
+            "model": model_name,
+            "predictions": [{"date": d.isoformat(), "price": float(p)} for d, p in zip(dates, prices)],
+            "metrics": {"loss": meta.get("loss") or 0, "tickers": len(frames)}
+        }]
+    } for ticker, (dates, prices) in forecasts.items()]
+
+async def predict_global(tickers: list, request: BatchPredictionRequest):
+    fetch_slots = asyncio.Semaphore(BATCH_FETCH_CONCURRENCY)
+
+    async def fetch(ticker):
+        async with fetch_slots:
+            return await run_in_threadpool(fetch_stock_data, ticker, period=request.period, api_source=request.api_source)
+
+    outcomes = await asyncio.gather(*[fetch(t) for t in tickers], return_exceptions=True)
+    frames, errors = {}, []
+    for ticker, outcome in zip(tickers, outcomes):
+        if isinstance(outcome, Exception):
+            errors.append({"ticker": ticker, "detail": str(outcome)})
+        else:
+            frames[ticker] = outcome
+    if not frames:
+        return {"model_type": request.model_type, "results": [], "errors": errors}
+    try:
+        results = await submit_with_cores(
+            lambda name, n_jobs: run_global_prediction(frames, request, n_jobs), "global", core_budget.share(1)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    forecast = {r["ticker"] for r in results}
+    errors += [{"ticker": t, "detail": "Not enough history for the global model"} for t in frames if t not in forecast]
+    return {"model_type": request.model_type, "global_model": True, "results": results, "errors": errors}
+
+@app.post("/predict/batch")
+async def predict_batch(request: BatchPredictionRequest):
+    tickers = list(dict.fromkeys(t.strip().upper() for t in request.tickers if t.strip()))
+    if not tickers:
+        raise HTTPException(status_code=400, detail="No tickers given")
+    
+    if request.global_model:
+        return await predict_global(tickers, request)
+    
+    def start_jobs():
+        fetch_slots = asyncio.Semaphore(BATCH_FETCH_CONCURRENCY)
+        return {predict_ticker(ticker, request, fetch_slots): ticker for ticker in tickers}
+    
+    if request.stream:
+        return stream_jobs(
+            start_jobs,
+            lambda results: {"model_type": request.model_type, "requested": len(tickers)},
+            fmt=request.stream,
+            name_key="ticker"
+        )
+    
+    jobs = start_jobs()
+    outcomes = await asyncio.gather(*jobs.keys(), return_exceptions=True)
+    results, errors = [], []
+    for ticker, outcome in zip(jobs.values(), outcomes):
+        if isinstance(outcome, Exception):
+            errors.append({"ticker": ticker, "detail": str(outcome)})
+        else:
+            results.append(outcome)
+    return {"model_type": request.model_type, "results": results, "errors": errors}
+
 @app.post("/simulate")
 async def simulate(request: PredictionRequest):
     try:
         # 1. Fetch Data
-        data = fetch_stock_data(request.ticker, period=request.period, api_source=request.api_source)
+        data = await run_in_threadpool(fetch_stock_data, request.ticker, period=request.period, api_source=request.api_source)
         
         # 2. Get Monte Carlo Predictor
         predictor = get_predictor("monte_carlo")
         predictor.train(data) # Calculate drift/volatility
         
         # 3. Predict Paths
-        # 3. Predict Paths
-        # Run 5000 simulations for accurate metrics
+        # Run 5000 simulations for accurate metrics (off the event loop, on the model executor)
         n_sims = 5000
-        future_dates, mean_path, paths = predictor.predict_paths(
-            data, 
-            days=request.days, 
-            iterations=n_sims, 
-            method=request.simulation_method,
-            drift_adj=request.drift_adj,
-            volatility_adj=request.volatility_adj
-        )
+        with track_stage("simulate", request.simulation_method):
+            future_dates, mean_path, paths = await submit_model(
+                predictor.predict_paths,
+                data, 
+                days=request.days, 
+                iterations=n_sims, 
+                method=request.simulation_method,
+                drift_adj=request.drift_adj,
+                volatility_adj=request.volatility_adj
+            )
         
         # Format dates
         dates = [d.isoformat() for d in future_dates]
         
-        # Prepare historical data for chart
-        historical_data = []
-        for index, row in data.iterrows():
-            item = {
-                "date": row['Date'].isoformat(),
-                "open": float(row['Open']),
-                "high": float(row['High']),
-                "low": float(row['Low']),
-                "close": float(row['Close']),
-                "volume": float(row['Volume']),
-                "sma_20": float(row['SMA_20']),
-                "sma_50": float(row['SMA_50']),
-                "rsi": float(row['RSI']),
-                "macd": float(row['MACD']),
-                "signal_line": float(row['Signal_Line']),
-                "upper_band": float(row['Upper_Band']),
-                "lower_band": float(row['Lower_Band'])
-            }
-            historical_data.append(item)
-            
-        current_price = get_current_price(request.ticker)
+        current_price = await run_in_threadpool(get_current_price, request.ticker)
         
         # Calculate Distribution (on ALL paths)
         final_prices = [path[-1] for path in paths]
@@ -281,16 +510,22 @@ async def simulate(request: PredictionRequest):
         var_95 = np.percentile(final_prices, 5) - current_price
         expected_return = (np.mean(final_prices) - current_price) / current_price
 
-        # Optimization: Only return 100 paths for visualization to prevent frontend crash
-        visual_paths = paths[:100]
+        # Only return a quantile-preserving subset of paths for visualization
+        visual_paths = subsample_paths(paths, request.max_paths)
+        
+        # Downsample the time axis to the client's point budget (shared indices keep paths aligned)
+        keep = lttb_indices(mean_path, request.max_points)
+        dates = [dates[i] for i in keep]
+        mean_path = np.asarray(mean_path)[keep]
+        visual_paths = visual_paths[:, keep] if len(visual_paths) else visual_paths
 
         return {
             "ticker": request.ticker,
             "current_price": current_price,
-            "historical": historical_data[-45:], # Return last 45 days (Zoomed In)
+            "historical": historical_records(data.iloc[-45:]), # Return last 45 days (Zoomed In)
             "dates": dates,
             "mean_path": [float(p) for p in mean_path],
-            "paths": [[float(p) for p in path] for path in visual_paths], # Limit to 100 paths
+            "paths": visual_paths.tolist(),
             "distribution": distribution,
             "var_95": float(var_95),
             "expected_return": float(expected_return)
@@ -300,148 +535,176 @@ async def simulate(request: PredictionRequest):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+def split_backtest(ticker: str, model_name: str, data, n_jobs: int = -1):
+    # The model is trained on the first 80% only, so that slice is what the registry keys on
+    split_ratio = 0.8
+    train_size = int(len(data) * split_ratio)
+
+    def train(predictor):
+        with track_stage("train", model_name):
+            history, _ = predictor.train(data.iloc[:train_size])
+        return train_loss(history)
+
+    predictor, _ = model_registry.get_or_train(
+        ticker, model_name, f"{data_version(data)}[:{train_size}]",
+        lambda: get_predictor(model_name, n_jobs=n_jobs), train
+    )
+    with track_stage("backtest", model_name):
+        return predictor.backtest(data, split_ratio, fit=False)
+
+def run_backtest(ticker: str, model_name: str, data, initial_capital: float, commission: float, n_jobs: int = -1,
+                 mode: str = "split", retrain_every: int = 20, train_window: int = None):
+    # Backtest a single model and simulate the AI trading strategy on its predictions
+    if mode == "split":
+        backtest_result = split_backtest(ticker, model_name, data, n_jobs)
+    else:
+        # Walk-forward: folds retrain on their own history, in parallel, without the registry
+        with track_stage("backtest", model_name):
+            backtest_result = walk_forward_backtest(model_name, data, mode, retrain_every, train_window, n_jobs=n_jobs)
+    # Predictor.backtest returns { dates, actual, predicted, metrics }
+    
+    # --- Calculate Equity Curve for AI ---
+    # Strategy: if Predicted (Next Day) > Current Price (Today) + Threshold, Buy.
+    # However, 'predicted' array from predictor.backtest aligns with 'actual'.
+    # It usually means Predicted[i] is the prediction for t=i made at t=i-1.
+    # So if Predicted[i] > Actual[i-1] * (1 + threshold), we should have bought at i-1.
+    
+    actuals = backtest_result['actual']
+    predicteds = backtest_result['predicted']
+    dates_iso = [pd.to_datetime(d).isoformat() for d in backtest_result['dates']]
+    
+    position = 0
+    cash = initial_capital
+    equity_curve = []
+    
+    # We iterate through the series.
+    # We need at least 2 points to compare previous actual with current prediction.
+    
+    for i in range(len(actuals)):
+        # Default: no action/value update
+        price = actuals[i]
+        
+        # Logic: At step i, we decide position for step i+1? 
+        # OR we verify if we made profit at step i based on decision at i-1.
+        
+        # Simplified Vectorized Backtest simulation loop:
+        # Decision at t: Compare Prediction(t+1) vs Price(t).
+        # But here we have aligned arrays. Predicted[t] is prediction for time t.
+        # So at t-1, we saw Prediction[t] and Price[t-1].
+        
+        if i == 0:
+            equity_curve.append(initial_capital)
+            continue
+            
+        prev_price = actuals[i-1]
+        curr_price = actuals[i] # This is price at t
+        pred_price_for_curr = predicteds[i] # This is what we predicted for t
+        
+        # Signal generation at t-1:
+        # If Prediction(t) > Price(t-1) * (1 + 0.001), Buy.
+        
+        signal = 0 # Neutral
+        if pred_price_for_curr > prev_price * 1.002: # 0.2% expected gain threshold
+            signal = 1
+        elif pred_price_for_curr < prev_price * 0.998: # 0.2% expected loss
+            signal = -1 # Sell/Short (but we only do Long/Cash for now)
+        
+        # EXECUTE TRADING based on Signal generated at t-1
+        # The position was established at Close of t-1 (or Open of t).
+        # Let's assume we trade at Close of t-1 based on the prediction for t.
+        
+        # Re-evaluating loop structure:
+        # It's cleaner to keep state.
+        # 'position' is amount of stock held entering day t.
+        
+        # But we are iterating i. i is "Today". 
+        # We need to render the decision made yesterday.
+        
+        # Let's look at i as "Today".
+        # We have Position from yesterday.
+        # We update Equity based on Today's Price.
+        
+        # Then we calculate Signal for TOMORROW (i+1).
+        # But we might not have Prediction(i+1) if i is last element.
+        # The arrays are aligned.
+        
+        # Let's use the signal from (i) corresponding to prediction[i] vs actual[i-1] to determine if we SHOULD BE holding stock at i.
+        
+        should_hold = False
+        if pred_price_for_curr > prev_price * 1.002:
+            should_hold = True
+            
+        # Execute outcome of holding/not holding from i-1 to i
+        cost_deduction = 0
+        
+        if should_hold:
+            # We wanted to be Long coming into i.
+            if position == 0:
+                # We bought at i-1.
+                # Price was prev_price.
+                # Commision handling roughly:
+                cost = cash * commission
+                buy_amt = cash - cost
+                position = buy_amt / prev_price
+                cash = 0
+                cost_deduction = cost
+        else:
+            # We wanted to be Cash coming into i.
+            if position > 0:
+                # We sold at i-1.
+                sale_val = position * prev_price
+                cost = sale_val * commission
+                cash = sale_val - cost
+                position = 0
+                cost_deduction = cost
+                
+        # Update Equity at i
+        curr_val = cash + (position * curr_price)
+        equity_curve.append(curr_val)
+        
+    metrics = backtest_result['metrics']
+    final_val = equity_curve[-1] if equity_curve else initial_capital
+    tot_ret = ((final_val - initial_capital) / initial_capital) * 100
+    
+    result = {
+        "model": model_name,
+        "dates": dates_iso,
+        "actual": [float(x) for x in actuals],
+        "predicted": [float(x) for x in predicteds],
+        "equity_curve": equity_curve,
+        "total_return": tot_ret,
+        "final_value": final_val,
+        "metrics": metrics
+    }
+    if "folds" in backtest_result:
+        result["folds"] = backtest_result["folds"]
+    return result
+
 @app.post("/backtest")
 async def backtest(request: PredictionRequest):
     try:
         # Check if this is a technical strategy backtest
         if request.strategy:
-            return run_strategy_backtest(request)
+            return await run_in_threadpool(run_strategy_backtest, request)
 
         # 1. Fetch Data (fetch more data for backtesting, e.g., 2 years)
-        data = fetch_stock_data(request.ticker, period="2y")
+        data = await run_in_threadpool(fetch_stock_data, request.ticker, period="2y")
         
         # 2. Get Model
-        models_to_test = []
-        if request.model_type == "all":
-            models_to_test = ["random_forest", "svr", "gradient_boosting", "monte_carlo"]
-        else:
-            if request.model_type == "lstm":
-                models_to_test = ["random_forest"] # Fallback
-            else:
-                models_to_test = [request.model_type]
-            
-        results = []
+        models_to_test = select_models(request.model_type)
         
-        for model_name in models_to_test:
-            predictor = get_predictor(model_name)
-            backtest_result = predictor.backtest(data) 
-            # Predictor.backtest returns { dates, actual, predicted, metrics }
-            
-            # --- Calculate Equity Curve for AI ---
-            # Strategy: if Predicted (Next Day) > Current Price (Today) + Threshold, Buy.
-            # However, 'predicted' array from predictor.backtest aligns with 'actual'.
-            # It usually means Predicted[i] is the prediction for t=i made at t=i-1.
-            # So if Predicted[i] > Actual[i-1] * (1 + threshold), we should have bought at i-1.
+        if request.stream:
+            return stream_model_results(
+                models_to_test,
+                lambda model_name, n_jobs: run_backtest(request.ticker, model_name, data, request.initial_capital, request.commission, n_jobs, request.backtest_mode, request.retrain_every, request.train_window),
+                lambda results: {"ticker": request.ticker},
+                fmt=request.stream
+            )
             
-            actuals = backtest_result['actual']
-            predicteds = backtest_result['predicted']
-            dates_iso = [pd.to_datetime(d).isoformat() for d in backtest_result['dates']]
-            
-            initial_capital = request.initial_capital
-            commission = request.commission
-            position = 0
-            cash = initial_capital
-            equity_curve = []
-            
-            # We iterate through the series.
-            # We need at least 2 points to compare previous actual with current prediction.
-            
-            for i in range(len(actuals)):
-                # Default: no action/value update
-                price = actuals[i]
-                
-                # Logic: At step i, we decide position for step i+1? 
-                # OR we verify if we made profit at step i based on decision at i-1.
-                
-                # Simplified Vectorized Backtest simulation loop:
-                # Decision at t: Compare Prediction(t+1) vs Price(t).
-                # But here we have aligned arrays. Predicted[t] is prediction for time t.
-                # So at t-1, we saw Prediction[t] and Price[t-1].
-                
-                if i == 0:
-                    equity_curve.append(initial_capital)
-                    continue
-                    
-                prev_price = actuals[i-1]
-                curr_price = actuals[i] # This is price at t
-                pred_price_for_curr = predicteds[i] # This is what we predicted for t
-                
-                # Signal generation at t-1:
-                # If Prediction(t) > Price(t-1) * (1 + 0.001), Buy.
-                
-                signal = 0 # Neutral
-                if pred_price_for_curr > prev_price * 1.002: # 0.2% expected gain threshold
-                    signal = 1
-                elif pred_price_for_curr < prev_price * 0.998: # 0.2% expected loss
-                    signal = -1 # Sell/Short (but we only do Long/Cash for now)
-                
-                # EXECUTE TRADING based on Signal generated at t-1
-                # The position was established at Close of t-1 (or Open of t).
-                # Let's assume we trade at Close of t-1 based on the prediction for t.
-                
-                # Re-evaluating loop structure:
-                # It's cleaner to keep state.
-                # 'position' is amount of stock held entering day t.
-                
-                # But we are iterating i. i is "Today". 
-                # We need to render the decision made yesterday.
-                
-                # Let's look at i as "Today".
-                # We have Position from yesterday.
-                # We update Equity based on Today's Price.
-                
-                # Then we calculate Signal for TOMORROW (i+1).
-                # But we might not have Prediction(i+1) if i is last element.
-                # The arrays are aligned.
-                
-                # Let's use the signal from (i) corresponding to prediction[i] vs actual[i-1] to determine if we SHOULD BE holding stock at i.
-                
-                should_hold = False
-                if pred_price_for_curr > prev_price * 1.002:
-                    should_hold = True
-                    
-                # Execute outcome of holding/not holding from i-1 to i
-                cost_deduction = 0
-                
-                if should_hold:
-                    # We wanted to be Long coming into i.
-                    if position == 0:
-                        # We bought at i-1.
-                        # Price was prev_price.
-                        # Commision handling roughly:
-                        cost = cash * commission
-                        buy_amt = cash - cost
-                        position = buy_amt / prev_price
-                        cash = 0
-                        cost_deduction = cost
-                else:
-                    # We wanted to be Cash coming into i.
-                    if position > 0:
-                        # We sold at i-1.
-                        sale_val = position * prev_price
-                        cost = sale_val * commission
-                        cash = sale_val - cost
-                        position = 0
-                        cost_deduction = cost
-                        
-                # Update Equity at i
-                curr_val = cash + (position * curr_price)
-                equity_curve.append(curr_val)
-                
-            metrics = backtest_result['metrics']
-            final_val = equity_curve[-1] if equity_curve else initial_capital
-            tot_ret = ((final_val - initial_capital) / initial_capital) * 100
-            
-            results.append({
-                "model": model_name,
-                "dates": dates_iso,
-                "actual": [float(x) for x in actuals],
-                "predicted": [float(x) for x in predicteds],
-                "equity_curve": equity_curve,
-                "total_return": tot_ret,
-                "final_value": final_val,
-                "metrics": metrics
-            })
+        results = await run_models(
+            models_to_test,
+            lambda model_name, n_jobs: run_backtest(request.ticker, model_name, data, request.initial_capital, request.commission, n_jobs, request.backtest_mode, request.retrain_every, request.train_window)
+        )
             
         # Top-level return of first model for frontend compatibility
         first_res = results[0] if results else {}
@@ -558,6 +821,8 @@ def run_strategy_backtest(request: PredictionRequest):
         "equity_curve": equity_curve
     }
 
+IMPORT_TIMES["backend.main"] = time.perf_counter() - _import_started
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,172 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+from backend.tracing import span
+
+# Minimal in-process metrics with Prometheus text exposition (format 0.0.4).
+# Kept dependency-free so it costs nothing on the free-tier image.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry = []
+_collectors = []
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ""
+    escaped = [(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in pairs]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, value, **labels):
+        # Mirror a count maintained elsewhere (e.g. cachetools' cache_info)
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_sample(self, key, value):
+        counts, total, count = value
+        lines = []
+        for bound, bucket_count in zip(self.buckets, counts):
+            labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+            lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+def register_collector(fn):
+    """Register a callable run at scrape time (for values read from elsewhere, e.g. cache stats)."""
+    _collectors.append(fn)
+    return fn
+
+
+def render_metrics():
+    """Prometheus text format for every registered metric."""
+    for collect in _collectors:
+        try:
+            collect()
+        except Exception as e:
+            print(f"Metrics collector failed: {e}")
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- Application metrics ---
+
+REQUEST_SECONDS = Histogram(
+    "stonks_http_request_duration_seconds", "HTTP request latency by endpoint.", ["method", "endpoint", "status"]
+)
+STAGE_SECONDS = Histogram(
+    "stonks_stage_duration_seconds", "Latency of request pipeline stages.", ["stage", "model"]
+)
+PROVIDER_REQUESTS = Counter(
+    "stonks_provider_requests_total", "Market data provider calls (cache misses).", ["provider"]
+)
+PROVIDER_ERRORS = Counter(
+    "stonks_provider_errors_total", "Market data provider calls that raised.", ["provider"]
+)
+CACHE_HITS = Counter("stonks_cache_hits_total", "Cache hits since start.", ["cache"])
+CACHE_MISSES = Counter("stonks_cache_misses_total", "Cache misses since start.", ["cache"])
+CACHE_SIZE = Gauge("stonks_cache_entries", "Entries currently held in a cache.", ["cache"])
+EXECUTOR_QUEUE_DEPTH = Gauge("stonks_model_queue_depth", "Model jobs waiting for a free worker.")
+EXECUTOR_FREE_CORES = Gauge("stonks_model_free_cores", "Cores of the model CPU budget not held by a running model.")
+MODEL_FITS = Counter(
+    "stonks_model_fits_total", "Model fits by kind (full refit or warm-start update).", ["model", "kind"]
+)
+
+
+@contextmanager
+def track_stage(stage, model=""):
+    """Time a pipeline stage into STAGE_SECONDS and record it as a trace span."""
+    start = time.perf_counter()
+    try:
+        with span(stage, model=model) if model else span(stage):
+            yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage, model=model)
+
+
+def timed_stage(stage):
+    """Decorator form of track_stage."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with track_stage(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,45 +1,282 @@
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import pandas as pd
 # TensorFlow/Keras removed for lighter deployment
+import collections
+import contextvars
+import copy
 import datetime
+import os
+from concurrent.futures import ThreadPoolExecutor
 from abc import ABC, abstractmethod
 
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score, mean_absolute_percentage_error
 from sklearn.preprocessing import MinMaxScaler
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.svm import SVR
-from sklearn.model_selection import RandomizedSearchCV
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, HistGradientBoostingRegressor
+from sklearn.svm import SVR, LinearSVR
+from sklearn.base import BaseEstimator, RegressorMixin, clone
+from sklearn.kernel_approximation import Nystroem
+from sklearn.pipeline import make_pipeline
+from sklearn.multioutput import MultiOutputRegressor
 import math
 from scipy.stats import norm
 
+from backend.feature_store import feature_store
+
+# Warm-start refresh policy: when new daily bars arrive, models that support it are updated
+# from their current state instead of refit. A full refit is required when
+MAX_UPDATE_BARS = 20       # more new bars than this arrived since the last fit,
+MAX_UPDATES = 10           # this many warm-start updates were chained since the last full refit,
+SCALER_TOLERANCE = 0.05    # or new bars fall outside the fitted scaling range by more than this fraction
+UPDATE_FRACTION = 0.1      # trees / boosting stages added per update, relative to the base model
+UPDATE_EPOCHS = 3          # extra LSTM epochs per update
+
+# Forecasting mode of the sklearn predictors:
+#   recursive  one-step model; each predicted Close is fed back through the indicators (default)
+#   direct     one multi-output model predicts days 1..FORECAST_HORIZON from the last window,
+#              so a forecast up to the horizon is a single inference call (see DirectForecaster)
+FORECAST_MODE = os.environ.get("FORECAST_MODE", "recursive")
+FORECAST_HORIZON = int(os.environ.get("FORECAST_HORIZON", 30))
+# Horizons fitted by estimators without native multi-output support (one model per bucket);
+# the days in between are interpolated
+DIRECT_ANCHORS = (1, 2, 3, 5, 7, 10, 15, 20, 30, 45, 60, 90)
+
 class BasePredictor(ABC):
-    def __init__(self, look_back=60):
+    # dtype of the training windows; tree models override with float32, which they use internally anyway
+    window_dtype = np.float64
+    # Floor for the RSI loss average during forecasting (None keeps inf/NaN semantics)
+    rsi_loss_floor = None
+    # Estimator hyperparameters; subclasses set their defaults, callers may override them
+    default_params = {}
+    # Whether update() can warm-start from the current fit
+    supports_update = False
+    # Candidate values per hyperparameter for tune_hyperparameters (empty: not tunable)
+    param_space = {}
+    # Whether the predictor can train a direct multi-horizon model, and whether its estimator
+    # fits all horizons at once (otherwise one estimator per DIRECT_ANCHORS bucket)
+    supports_direct = False
+    native_multioutput = False
+    forecast_mode = FORECAST_MODE
+    forecast_horizon = FORECAST_HORIZON
+
+    def __init__(self, look_back=60, n_jobs=-1, params=None):
         self.look_back = look_back
+        self.n_jobs = n_jobs # Cores available to estimators that support it
+        self.params = {**self.default_params, **(params or {})}
         self.model = None
+        self.trained_through = None # (last Date, last Close) of the data the model has seen
+        self.trained_from = None # First Date of that data
+        self.updates = 0 # Warm-start updates since the last full fit
         self.scaler = MinMaxScaler(feature_range=(0, 1))
         self.feature_columns = ['Close', 'SMA_20', 'SMA_50', 'EMA_12', 'EMA_26', 'RSI', 'MACD', 'Signal_Line', 'Upper_Band', 'Lower_Band']
 
+    def hyperparameters(self):
+        """Everything that changes what train() produces; part of the model registry key."""
+        params = {"look_back": self.look_back, "features": self.feature_columns, **self.params}
+        if self.direct:
+            params.update(forecast_mode="direct", forecast_horizon=self.forecast_horizon)
+        return params
+
+    @property
+    def direct(self):
+        return self.supports_direct and self.forecast_mode == "direct"
+
+    def with_cores(self, n_jobs):
+        """
+        Shallow copy that predicts with n_jobs cores. The fitted estimator is shared, not copied:
+        cached models keep the n_jobs of the request that trained them, so every request runs
+        its own copy with the cores it was granted.
+        """
+        copied = copy.copy(self)
+        copied.n_jobs = n_jobs
+        copied.model = _with_n_jobs(self.model, n_jobs)
+        return copied
+
     @abstractmethod
     def train(self, data, epochs=25, batch_size=32):
         pass
 
-    @abstractmethod
     def predict_future(self, data, days=30):
-        pass
-        
-    def tune_hyperparameters(self, x_train, y_train):
-        # Default implementation: do nothing
-        pass
-        
-    def backtest(self, data, split_ratio=0.8):
+        if isinstance(self.model, DirectForecaster):
+            return self._predict_direct(data, days)
+        # Recursive multivariate forecast: each predicted Close is fed back as the next row.
+        # The last look_back scaled rows live in a ring buffer and the indicators are updated
+        # incrementally, so a step costs O(look_back) instead of O(history).
+        n_features = len(self.feature_columns)
+        scale, offset = self.scaler.scale_, self.scaler.min_
+
+        # The ring is stored twice over, so the current window is always one contiguous slice
+        buffer = np.empty((2 * self.look_back, n_features))
+        initial = self.scaler.transform(data[self.feature_columns].values[-self.look_back:])
+        buffer[:self.look_back] = initial
+        buffer[self.look_back:] = initial
+        pos = 0 # Current window is buffer[pos:pos + look_back]
+
+        indicators = IndicatorState(data, self.feature_columns, self.rsi_loss_floor)
+        predicted_prices = np.empty(days)
+        future_dates = []
+        last_date = data['Date'].iloc[-1]
+
+        for i in range(days):
+            pred_scaled = self._predict_window(buffer[pos:pos + self.look_back])
+
+            # Inverse transform of the Close column only
+            pred_price = (pred_scaled - offset[0]) / scale[0]
+            predicted_prices[i] = pred_price
+
+            last_date = last_date + datetime.timedelta(days=1)
+            future_dates.append(last_date)
+
+            # The new row replaces the oldest one in both copies of the ring
+            row = indicators.push(pred_price) * scale + offset
+            buffer[pos] = row
+            buffer[pos + self.look_back] = row
+            pos = (pos + 1) % self.look_back
+
+        return future_dates, predicted_prices
+
+    def _predict_direct(self, data, days):
+        # One inference call per forecast_horizon days. Beyond the horizon the predicted block is
+        # pushed through the indicators and the next block is predicted from the updated window.
+        scale, offset = self.scaler.scale_, self.scaler.min_
+        window = self.scaler.transform(data[self.feature_columns].values[-self.look_back:])
+        indicators = IndicatorState(data, self.feature_columns, self.rsi_loss_floor)
+        predicted_prices = np.empty(days)
+        done = 0
+        while done < days:
+            block = min(days - done, self.model.max_horizon)
+            path = self.model.predict_path(window.reshape(1, -1), block)[0]
+            predicted_prices[done:done + block] = (path - offset[0]) / scale[0]
+            done += block
+            if done < days:
+                rows = [indicators.push(price) * scale + offset for price in predicted_prices[done - block:done]]
+                window = np.vstack([window, rows])[-self.look_back:]
+
+        last_date = data['Date'].iloc[-1]
+        future_dates = [last_date + datetime.timedelta(days=i + 1) for i in range(days)]
+        return future_dates, predicted_prices
+
+    def _predict_window(self, window):
+        # (look_back, features) scaled window -> scaled Close prediction
+        return self.model.predict(window.reshape(1, -1))[0]
+
+    def _predict_windows(self, scaled_rows):
+        # One-step predictions for every window of scaled_rows (one per row after the first look_back)
+        return self.model.predict(window_view(scaled_rows, self.look_back, flatten=True))
+
+    def walk_forward_fold(self, data, train_start, test_start, test_end):
+        """
+        One walk-forward fold: fit on rows [train_start, test_start), then predict Close one step
+        ahead for rows [test_start, test_end), each from the look_back rows before it.
+        Returns the predicted prices.
+        """
+        self.train(data.iloc[train_start:test_start])
+        # The window of the first test row may reach back before train_start; that is still past data
+        # Window k covers rows k .. k+look_back-1 and targets row k+look_back, i.e. test row k
+        rows = data[self.feature_columns].values[test_start - self.look_back:test_end]
+        pred_scaled = np.asarray(self._predict_windows(self.scaler.transform(rows))).reshape(-1)
+        return (pred_scaled - self.scaler.min_[0]) / self.scaler.scale_[0]
+        
+    def mark_trained(self, data, updated=False):
+        """Remember how far the model has seen the data; called after train() or update()."""
+        closes = data['Close'].values
+        self.trained_through = (data['Date'].iloc[-1], float(closes[-1]), float(closes[-2]))
+        self.trained_from = data['Date'].iloc[0]
+        self.updates = self.updates + 1 if updated else 0
+
+    def plan_update(self, data):
+        """
+        Decide between a warm-start update and a full refit for newer data.
+        Returns:
+            (new_bars, reason): reason is None if update(data, new_bars) may be used,
+            otherwise why a full refit is required
+        """
+        if not self.supports_update or self.trained_through is None:
+            return 0, "model does not support warm-start updates"
+        if isinstance(self.model, DirectForecaster):
+            return 0, "direct multi-horizon models are refit, not warm-started"
+        last_date, last_close, previous_close = self.trained_through
+        dates = pd.to_datetime(data['Date'])
+        if pd.Timestamp(self.trained_from) != dates.iloc[0]:
+            return 0, "history starts at a different bar than the trained one"
+        seen = np.flatnonzero(dates == pd.Timestamp(last_date))
+        if len(seen) == 0 or seen[-1] == 0:
+            return 0, "last trained bar is no longer in the history"
+        closes = data['Close'].values
+        i = seen[-1]
+        if not np.isclose(closes[i - 1], previous_close, rtol=1e-6):
+            return 0, "history was revised (split or dividend adjustment)"
+        new_bars = len(data) - 1 - i
+        if not np.isclose(closes[i], last_close, rtol=1e-6):
+            new_bars += 1 # The last trained bar was still forming; it counts as new
+        if new_bars == 0:
+            return 0, "no new bars"
+        if new_bars > MAX_UPDATE_BARS:
+            return new_bars, f"{new_bars} new bars (more than {MAX_UPDATE_BARS})"
+        if self.updates >= MAX_UPDATES:
+            return new_bars, f"{self.updates} updates since the last full refit"
+        # Updates keep the fitted scaler, so the new bars have to fit its range
+        scaled = self.scaler.transform(data[self.feature_columns].values[-new_bars:])
+        if np.nanmin(scaled) < -SCALER_TOLERANCE or np.nanmax(scaled) > 1 + SCALER_TOLERANCE:
+            return new_bars, "new bars are outside the fitted scaling range"
+        return new_bars, None
+
+    def update(self, data, new_bars):
+        """
+        Warm-start the fitted model on data whose last new_bars rows are new.
+        Returns the training loss, like train().
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support warm-start updates")
+
+    def _update_windows(self, data, flatten=True):
+        # Training windows scaled with the already fitted scaler (an update must not refit it)
+        scaled_data = self.scaler.transform(data[self.feature_columns].values)
+        x_train = window_view(scaled_data.astype(self.window_dtype, copy=False), self.look_back, flatten=flatten)
+        return x_train, scaled_data[self.look_back:, 0]
+
+    def build_estimator(self, n_samples=None):
+        """Unfitted estimator for the current params (sklearn predictors), for n_samples training windows."""
+        raise NotImplementedError(f"{type(self).__name__} has no sklearn estimator")
+
+    def fit_estimator(self, x_train, y_train, scaled_data):
+        """
+        Fit self.model on the training windows: a one-step estimator, or in direct mode a
+        DirectForecaster whose targets are the next forecast_horizon Closes of every window.
+        """
+        horizon = self.forecast_horizon
+        if self.direct and len(y_train) > horizon:
+            # Windows whose last target is still in the history; y_train[i + h - 1] is day h of window i
+            targets = sliding_window_view(scaled_data[self.look_back:, 0], horizon)
+            horizons = direct_horizons(horizon, self.native_multioutput)
+            self.model = DirectForecaster(self.build_estimator(len(targets)), horizons, self.native_multioutput, self.n_jobs)
+            self.model.fit(x_train[:len(targets)], targets[:, np.asarray(horizons) - 1])
+        else:
+            self.model = self.build_estimator(len(y_train))
+            self.model.fit(x_train, y_train)
+
+    def tune_hyperparameters(self, x_train, y_train, time_budget=None, n_jobs=None):
+        """
+        Successive-halving search over param_space with time-series CV (see tuning.py).
+        Adopts the best parameters found and returns the search summary, or None if not tunable.
+        """
+        if not self.param_space:
+            return None
+        from backend.tuning import successive_halving
+        result = successive_halving(self, x_train, y_train, time_budget=time_budget, n_jobs=n_jobs)
+        self.params.update(result["params"])
+        return result
+        
+    def backtest(self, data, split_ratio=0.8, fit=True):
         # Default implementation for backtesting
+        # fit=False: the predictor was already trained on data.iloc[:train_size] (e.g. from the model registry)
         # 1. Split data
         train_size = int(len(data) * split_ratio)
         train_data = data.iloc[:train_size]
         test_data = data.iloc[train_size:]
         
         # 2. Train on train_data
-        self.train(train_data)
+        if fit:
+            self.train(train_data)
         
         # 3. Prepare test data for prediction
         # We need to prepare X_test such that it corresponds to y_test (test_data['Close'])
@@ -98,38 +335,7 @@ class BasePredictor(ABC):
         confidence_interval = 1.96 * std_dev
         
         # Risk Metrics (Forecast vs Actual Analysis)
-        def calculate_risk_metrics(prices):
-            if len(prices) < 2:
-                return {}
-            
-            # Daily Returns
-            returns = np.diff(prices) / prices[:-1]
-            
-            # Annualized Volatility
-            volatility = np.std(returns) * np.sqrt(252)
-            
-            # Sharpe Ratio (assuming 0% risk free for simplicity)
-            mean_return = np.mean(returns)
-            std_return = np.std(returns)
-            sharpe_ratio = (mean_return / std_return) * np.sqrt(252) if std_return > 0 else 0
-            
-            # VaR (95% Parametric)
-            var_95 = norm.ppf(0.05, mean_return, std_return)
-            
-            # Max Drawdown
-            cum_returns = np.cumprod(1 + returns)
-            peak = np.maximum.accumulate(cum_returns)
-            drawdown = (cum_returns - peak) / peak
-            max_drawdown = np.min(drawdown)
-            
-            return {
-                "volatility": volatility,
-                "sharpe": sharpe_ratio,
-                "var_95": var_95,
-                "max_drawdown": max_drawdown
-            }
-            
-        predicted_risk = calculate_risk_metrics(predictions)
+        predicted_risk = risk_metrics(predictions)
         # We can also return 'actual' risk metrics if useful for comparison, 
         # but 'predicted_risk' is what characterizes the forecast's nature.
         
@@ -160,57 +366,237 @@ class BasePredictor(ABC):
             "feature_importance": feature_importance
         }
         
-    def prepare_data_lstm(self, data):
-        # Select features
-        dataset = data[self.feature_columns].values
-        
-        # Scale data
-        scaled_data = self.scaler.fit_transform(dataset)
-        
-        x_train, y_train = [], []
+    def prepare_data_lstm(self, data, dtype=None):
+        # Scaled features come from the shared feature store: the scaler is fit once per
+        # distinct feature matrix and every model gets read-only views of the same array
+        self.scaler, scaled, scaled_data = feature_store.scaled(data, self.feature_columns, dtype or self.window_dtype)
         
         # We predict 'Close' (index 0) based on all features
-        for i in range(self.look_back, len(scaled_data)):
-            x_train.append(scaled_data[i-self.look_back:i, :]) # All features
-            y_train.append(scaled_data[i, 0]) # Target is Close price (index 0)
-            
-        x_train, y_train = np.array(x_train), np.array(y_train)
-        
-        # Reshape x_train for LSTM [samples, time steps, features]
-        x_train = np.reshape(x_train, (x_train.shape[0], x_train.shape[1], len(self.feature_columns)))
+        # x_train: [samples, time steps, features] strided view, no copy
+        x_train = window_view(scaled, self.look_back, flatten=False)
+        y_train = scaled_data[self.look_back:, 0] # Target is Close price (index 0)
         
         return x_train, y_train, scaled_data
 
-    def prepare_data_sklearn(self, data):
+    def prepare_data_sklearn(self, data, dtype=None):
         # For sklearn, we flatten the window
-        dataset = data[self.feature_columns].values
-        scaled_data = self.scaler.fit_transform(dataset)
-        
-        x_train, y_train = [], []
+        self.scaler, scaled, scaled_data = feature_store.scaled(data, self.feature_columns, dtype or self.window_dtype)
         
-        for i in range(self.look_back, len(scaled_data)):
-            # Flatten the window of features
-            window = scaled_data[i-self.look_back:i, :]
-            x_train.append(window.flatten())
-            y_train.append(scaled_data[i, 0]) # Target is Close price
+        # Row i is scaled_data[i:i+look_back].flatten(), as a read-only strided view.
+        # Estimators copy it into contiguous memory only if they need to.
+        x_train = window_view(scaled, self.look_back, flatten=True)
+        y_train = scaled_data[self.look_back:, 0] # Target is Close price
             
-        return np.array(x_train), np.array(y_train), scaled_data
+        return x_train, y_train, scaled_data
+
+def _with_n_jobs(estimator, n_jobs):
+    # Shallow copy of a fitted estimator (and of the wrappers around it) with another n_jobs
+    if estimator is None or not hasattr(estimator, "n_jobs"):
+        return estimator
+    estimator = copy.copy(estimator)
+    estimator.n_jobs = n_jobs
+    inner = getattr(estimator, "model_", None) # DirectForecaster / HistBoostingRegressor
+    if inner is not None:
+        estimator.model_ = _with_n_jobs(inner, n_jobs)
+    members = getattr(estimator, "estimators_", None)
+    if isinstance(members, list) and members and hasattr(members[0], "n_jobs"):
+        # MultiOutputRegressor: parallel across outputs, each single-threaded
+        estimator.estimators_ = [_with_n_jobs(m, 1) for m in members]
+    return estimator
+
+
+def direct_horizons(max_horizon, native_multioutput):
+    """Forecast days (1-based) a direct model is fitted on; always includes 1 and max_horizon."""
+    if native_multioutput:
+        return list(range(1, max_horizon + 1))
+    return sorted({h for h in DIRECT_ANCHORS if h < max_horizon} | {1, max_horizon})
+
+
+class DirectForecaster(BaseEstimator, RegressorMixin):
+    """
+    Direct multi-horizon model: predicts the scaled Close `h` days after each window for every
+    fitted horizon. predict() returns the 1-day head, so backtests and walk-forward folds score
+    it like a one-step model; predict_path() returns whole forecasts.
+    """
+
+    def __init__(self, estimator, horizons, native_multioutput=False, n_jobs=None):
+        self.estimator = estimator
+        self.horizons = horizons
+        self.native_multioutput = native_multioutput
+        self.n_jobs = n_jobs
+
+    @property
+    def max_horizon(self):
+        return self.horizons[-1]
+
+    def fit(self, X, Y):
+        # Y: (samples, len(horizons)) targets
+        if self.native_multioutput:
+            self.model_ = self.estimator.fit(X, Y)
+        else:
+            # Parallel across horizons, so each per-horizon estimator gets one core
+            estimator = self.estimator
+            if "n_jobs" in estimator.get_params():
+                estimator = clone(estimator).set_params(n_jobs=1)
+            self.model_ = MultiOutputRegressor(estimator, n_jobs=self.n_jobs).fit(X, Y)
+        return self
+
+    def predict(self, X):
+        return self.model_.predict(X)[:, 0]
+
+    def predict_path(self, X, days):
+        """(samples, days) forecasts for days 1..days (<= max_horizon), interpolated between horizons."""
+        predicted = self.model_.predict(X)
+        steps = np.arange(1, days + 1)
+        return np.array([np.interp(steps, self.horizons, row) for row in predicted])
+
+    @property
+    def feature_importances_(self):
+        if self.native_multioutput:
+            return self.model_.feature_importances_
+        return np.mean([m.feature_importances_ for m in self.model_.estimators_], axis=0)
+
+
+def risk_metrics(prices):
+    # Risk profile of a price series: annualized volatility, Sharpe, 95% parametric VaR, max drawdown
+    if len(prices) < 2:
+        return {}
+    
+    # Daily Returns
+    returns = np.diff(prices) / prices[:-1]
+    
+    # Annualized Volatility
+    volatility = np.std(returns) * np.sqrt(252)
+    
+    # Sharpe Ratio (assuming 0% risk free for simplicity)
+    mean_return = np.mean(returns)
+    std_return = np.std(returns)
+    sharpe_ratio = (mean_return / std_return) * np.sqrt(252) if std_return > 0 else 0
+    
+    # VaR (95% Parametric)
+    var_95 = norm.ppf(0.05, mean_return, std_return)
+    
+    # Max Drawdown
+    cum_returns = np.cumprod(1 + returns)
+    peak = np.maximum.accumulate(cum_returns)
+    drawdown = (cum_returns - peak) / peak
+    max_drawdown = np.min(drawdown)
+    
+    return {
+        "volatility": volatility,
+        "sharpe": sharpe_ratio,
+        "var_95": var_95,
+        "max_drawdown": max_drawdown
+    }
+
+def window_view(scaled_data, look_back, flatten=True):
+    """
+    Zero-copy training windows over a (samples, features) array.
+    Window k covers rows k .. k+look_back-1 (the target is row k+look_back), so there are
+    len(scaled_data) - look_back windows.
+    Returns:
+        (windows, look_back * features) if flatten, else (windows, look_back, features)
+    """
+    scaled_data = np.ascontiguousarray(scaled_data)
+    n_rows, n_features = scaled_data.shape
+    if n_rows <= look_back:
+        return np.empty((0, look_back * n_features) if flatten else (0, look_back, n_features), dtype=scaled_data.dtype)
+    if flatten:
+        # In C order a window of rows is one contiguous run of the raveled array,
+        # so the flattened windows are a 1-D sliding view stepped by one row
+        flat = scaled_data[:-1].ravel()
+        return sliding_window_view(flat, look_back * n_features)[::n_features]
+    # sliding_window_view puts the window axis last: (windows, features, look_back)
+    return sliding_window_view(scaled_data[:-1], look_back, axis=0).transpose(0, 2, 1)
+
+class IndicatorState:
+    """
+    Incremental form of the indicators from data_service.add_technical_indicators, for
+    recursive forecasting. Seeded from the last rows of an indicator frame; push(close)
+    returns the next feature row without recomputing anything over the full history.
+    """
+    history = 50 # Longest rolling window (SMA_50); RSI needs 15 closes, Bollinger 20
+
+    def __init__(self, data, feature_columns, rsi_loss_floor=None):
+        self.feature_columns = feature_columns
+        self.rsi_loss_floor = rsi_loss_floor
+        self.closes = collections.deque(data['Close'].values[-self.history:].astype(float), maxlen=self.history)
+        last = data.iloc[-1]
+        # EWMs with adjust=False are plain recursions, so the last values are all the state needed
+        self.ema_12 = float(last['EMA_12'])
+        self.ema_26 = float(last['EMA_26'])
+        self.signal = float(last['Signal_Line'])
+        self.last_row = np.array([float(last[col]) for col in feature_columns])
+
+    def push(self, close):
+        """Append a close and return the new row in feature_columns order."""
+        self.closes.append(close)
+        closes = np.fromiter(self.closes, dtype=float, count=len(self.closes))
+
+        self.ema_12 = _ewm_step(self.ema_12, close, 12)
+        self.ema_26 = _ewm_step(self.ema_26, close, 26)
+        macd = self.ema_12 - self.ema_26
+        self.signal = _ewm_step(self.signal, macd, 9)
+
+        sma_20 = closes[-20:].mean() if len(closes) >= 20 else np.nan
+        sma_50 = closes[-50:].mean() if len(closes) >= 50 else np.nan
+        std_dev = closes[-20:].std(ddof=1) if len(closes) >= 20 else np.nan
+
+        rsi = np.nan
+        if len(closes) >= 15:
+            delta = np.diff(closes[-15:])
+            gain = np.where(delta > 0, delta, 0).mean()
+            loss = np.where(delta < 0, -delta, 0).mean()
+            if loss == 0 and self.rsi_loss_floor is not None:
+                loss = self.rsi_loss_floor
+            if loss > 0:
+                rsi = 100 - (100 / (1 + gain / loss))
+            elif gain > 0:
+                rsi = 100.0 # gain / 0 = inf; 0 / 0 stays NaN and is forward-filled
+
+        values = {
+            'Close': close, 'SMA_20': sma_20, 'SMA_50': sma_50,
+            'EMA_12': self.ema_12, 'EMA_26': self.ema_26, 'RSI': rsi,
+            'MACD': macd, 'Signal_Line': self.signal,
+            'Upper_Band': sma_20 + (std_dev * 2), 'Lower_Band': sma_20 - (std_dev * 2)
+        }
+        row = np.array([values.get(col, np.nan) for col in self.feature_columns])
+
+        # Same as fillna(method='ffill') on the growing frame
+        missing = np.isnan(row)
+        row[missing] = self.last_row[missing]
+        self.last_row = row
+        return row
+
+def _ewm_step(previous, value, span):
+    # One step of Series.ewm(span=span, adjust=False).mean()
+    alpha = 2 / (span + 1)
+    return (1 - alpha) * previous + alpha * value
 
-import os
 # Suppress TensorFlow logs
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 
-try:
-    from tensorflow.keras.models import Sequential
-    from tensorflow.keras.layers import LSTM, Dense, Dropout, Input
-    TF_AVAILABLE = True
-except ImportError:
-    TF_AVAILABLE = False
-    print("TensorFlow not available. LSTM models will be disabled.")
+# TensorFlow takes seconds to import, so it is only loaded when an LSTM is built
+TF_AVAILABLE = None
+
+def _load_keras():
+    global TF_AVAILABLE, Sequential, LSTM, Dense, Dropout, Input
+    if TF_AVAILABLE is None:
+        try:
+            from tensorflow.keras.models import Sequential
+            from tensorflow.keras.layers import LSTM, Dense, Dropout, Input
+            TF_AVAILABLE = True
+        except ImportError:
+            TF_AVAILABLE = False
+            print("TensorFlow not available. LSTM models will be disabled.")
+    return TF_AVAILABLE
 
 class LSTMPredictor(BasePredictor):
+    rsi_loss_floor = 0.001 # Avoid division by zero
+    supports_update = True
+
     def build_model(self, input_shape):
-        if not TF_AVAILABLE:
+        if not _load_keras():
             raise ImportError("TensorFlow is not installed. Cannot use LSTM predictor.")
             
         model = Sequential()
@@ -235,99 +621,92 @@ class LSTMPredictor(BasePredictor):
         history = self.model.fit(x_train, y_train, batch_size=batch_size, epochs=epochs, verbose=0)
         return history, scaled_data
 
-    def predict_future(self, data, days=30):
-        # Multivariate prediction logic (similar to RF but using 3D input)
-        current_df = data.copy()
-        future_dates = []
-        predicted_prices = []
-        last_date = current_df['Date'].iloc[-1]
-        
-        for i in range(days):
-            dataset = current_df[self.feature_columns].values
-            scaled_data = self.scaler.transform(dataset)
-            
-            # Get last window (3D for LSTM)
-            current_batch = scaled_data[-self.look_back:].reshape(1, self.look_back, len(self.feature_columns))
-            
-            # Predict
-            pred_scaled = self.model.predict(current_batch, verbose=0)[0][0]
-            
-            # Inverse transform
-            dummy_row = np.zeros((1, len(self.feature_columns)))
-            dummy_row[0, 0] = pred_scaled
-            pred_price = self.scaler.inverse_transform(dummy_row)[0, 0]
-            
-            predicted_prices.append(pred_price)
-            
-            # Next Date & Update DF
-            next_date = last_date + datetime.timedelta(days=1)
-            future_dates.append(next_date)
-            last_date = next_date
-            
-            new_row = {'Date': next_date, 'Close': pred_price}
-            new_df_row = pd.DataFrame([new_row])
-            current_df = pd.concat([current_df, new_df_row], ignore_index=True)
-            
-            # Re-calc indicators (Simplified for brevity, assumes minimal drift in 1 step)
-            # Ideally should duplicate logic from BasePredictor's other implementations
-            # reusing code:
-            self._update_indicators(current_df)
-            current_df = current_df.fillna(method='ffill')
-            
-        return future_dates, np.array(predicted_prices)
-
-    def _update_indicators(self, df):
-        # Helper to update indicators on the growing dataframe
-        df['SMA_20'] = df['Close'].rolling(window=20).mean()
-        df['SMA_50'] = df['Close'].rolling(window=50).mean()
-        df['EMA_12'] = df['Close'].ewm(span=12, adjust=False).mean()
-        df['EMA_26'] = df['Close'].ewm(span=26, adjust=False).mean()
-        
-        delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        # Avoid division by zero
-        loss = loss.replace(0, 0.001)
-        rs = gain / loss
-        df['RSI'] = 100 - (100 / (1 + rs))
-        
-        df['MACD'] = df['EMA_12'] - df['EMA_26']
-        df['Signal_Line'] = df['MACD'].ewm(span=9, adjust=False).mean()
-        
-        std_dev = df['Close'].rolling(window=20).std()
-        df['Upper_Band'] = df['SMA_20'] + (std_dev * 2)
-        df['Lower_Band'] = df['SMA_20'] - (std_dev * 2)
+    def update(self, data, new_bars, batch_size=32):
+        # A few more epochs from the current weights
+        x_train, y_train = self._update_windows(data, flatten=False)
+        history = self.model.fit(x_train, y_train, batch_size=batch_size, epochs=UPDATE_EPOCHS, verbose=0)
+        return float(history.history['loss'][-1])
+
+    def _predict_window(self, window):
+        # LSTM takes the window as one (1, look_back, features) batch
+        return self.model.predict(window[np.newaxis], verbose=0)[0][0]
+
+    def _predict_windows(self, scaled_rows):
+        return self.model.predict(window_view(scaled_rows, self.look_back, flatten=False), verbose=0)
 
 class EnsemblePredictor(BasePredictor):
-    def __init__(self, look_back=60):
-        super().__init__(look_back)
-        self.models = [
-            RandomForestPredictor(look_back),
-            GradientBoostingPredictor(look_back)
-        ]
+    # model_type -> weight; ENSEMBLE_MEMBERS overrides it, e.g. "random_forest=2,gradient_boosting=1,svr=1"
+    default_members = {"random_forest": 1.0, "gradient_boosting": 1.0}
+
+    def __init__(self, look_back=60, n_jobs=-1, params=None, members=None):
+        super().__init__(look_back, n_jobs, params)
+        members = members or parse_members(os.environ.get("ENSEMBLE_MEMBERS")) or self.default_members
+        if isinstance(members, (list, tuple)):
+            members = {name: 1.0 for name in members}
+        if "ensemble" in members:
+            raise ValueError("An ensemble cannot contain itself")
+        # Members run concurrently, so they split the cores given to the ensemble
+        cores = (os.cpu_count() or 1) if n_jobs is None or n_jobs < 0 else n_jobs
+        member_jobs = max(1, cores // len(members))
+        self.member_types = list(members)
+        self.models = [get_predictor(name, look_back=look_back, n_jobs=member_jobs) for name in self.member_types]
+        total = float(sum(members.values()))
+        self.weights = np.array([members[name] / total for name in self.member_types])
+
+    def _run_members(self, fn):
+        # fn(member) for every member in parallel threads (fits release the GIL), in member order
+        if len(self.models) == 1:
+            return [fn(self.models[0])]
+        with ThreadPoolExecutor(max_workers=len(self.models), thread_name_prefix="ensemble") as pool:
+            # One context copy per task, so trace spans of each member attach to the request
+            futures = [pool.submit(contextvars.copy_context().run, fn, model) for model in self.models]
+            return [f.result() for f in futures]
+
+    def _share_features(self, *frames):
+        # Scale each frame once per window dtype up front, so members start from the shared
+        # feature store instead of racing to build the same matrix
+        for frame in frames:
+            for dtype in {m.window_dtype for m in self.models if not isinstance(m, MonteCarloPredictor)}:
+                feature_store.scaled(frame, self.feature_columns, dtype)
         
     def train(self, data, epochs=None, batch_size=None):
-        for model in self.models:
-            model.train(data, epochs, batch_size)
+        self._share_features(data)
+        self._run_members(lambda model: model.train(data, epochs, batch_size))
         
         class History:
             history = {'loss': [0]}
         return History(), None # Logic handled in sub-models
 
+    def with_cores(self, n_jobs):
+        copied = super().with_cores(n_jobs)
+        cores = (os.cpu_count() or 1) if n_jobs is None or n_jobs < 0 else n_jobs
+        copied.models = [m.with_cores(max(1, cores // len(self.models))) for m in self.models]
+        return copied
+
+    def hyperparameters(self):
+        return {
+            "look_back": self.look_back,
+            "members": {
+                name: {"weight": float(w), **m.hyperparameters()}
+                for name, w, m in zip(self.member_types, self.weights, self.models)
+            }
+        }
+
+    def walk_forward_fold(self, data, train_start, test_start, test_end):
+        # Folds already run in parallel, so members run one after another here
+        preds = [m.walk_forward_fold(data, train_start, test_start, test_end) for m in self.models]
+        return np.average(preds, axis=0, weights=self.weights)
+
     def predict_future(self, data, days=30):
         # Gather predictions from all models
-        all_preds = []
-        future_dates = []
-        for model in self.models:
-            dates, preds = model.predict_future(data, days)
-            all_preds.append(preds)
-            future_dates = dates 
+        results = self._run_members(lambda model: model.predict_future(data, days))
+        future_dates = results[0][0]
         
-        # Average them
-        avg_preds = np.mean(all_preds, axis=0)
+        # Weighted average
+        avg_preds = np.average([preds for _, preds in results], axis=0, weights=self.weights)
         return future_dates, avg_preds
         
-    def backtest(self, data, split_ratio=0.8):
+    def backtest(self, data, split_ratio=0.8, fit=True):
         # Custom backtest for ensemble: average the backtest results of sub-models?
         # Or train and predict as a unit.
         # Let's train and predict as a unit using base implementation but overriding predict logic.
@@ -337,18 +716,19 @@ class EnsemblePredictor(BasePredictor):
         # Simpler: Override backtest to run backtest on each submodel and average the 'predicted' array?
         # Yes, that's robust.
         
-        results = []
-        for model in self.models:
-            res = model.backtest(data, split_ratio)
-            results.append(res)
+        if fit:
+            self._share_features(data.iloc[:int(len(data) * split_ratio)], data)
+        else:
+            self._share_features(data)
+        results = self._run_members(lambda model: model.backtest(data, split_ratio, fit))
             
         # Combine
         dates = results[0]['dates']
         actual = results[0]['actual']
         
-        # Average predictions
+        # Weighted average of the predictions
         preds_stack = np.vstack([r['predicted'] for r in results])
-        avg_pred = np.mean(preds_stack, axis=0)
+        avg_pred = np.average(preds_stack, axis=0, weights=self.weights)
         
         # Recalculate metrics for the average
         mae = mean_absolute_error(actual, avg_pred)
@@ -371,9 +751,12 @@ class EnsemblePredictor(BasePredictor):
         dd = (cum_ret - peak) / peak
         max_dd = np.min(dd) if len(dd) > 0 else 0
 
-        # Feature Importance (average? specific to tree models)
-        # Just take first model's for now or merge
-        feat_imp = results[0]['feature_importance']
+        # Feature Importance: weighted merge over the members that report it (tree models)
+        feat_imp = {}
+        for weight, r in zip(self.weights, results):
+            for name, value in r.get('feature_importance', {}).items():
+                feat_imp[name] = feat_imp.get(name, 0) + weight * value
+        feat_imp = dict(sorted(feat_imp.items(), key=lambda item: item[1], reverse=True))
         
         return {
             "dates": dates,
@@ -391,213 +774,237 @@ class EnsemblePredictor(BasePredictor):
 
 
 class RandomForestPredictor(BasePredictor):
+    window_dtype = np.float32
+    # Fixed hyperparameters to avoid timeout on Render
+    default_params = {"n_estimators": 100, "max_depth": 20, "min_samples_split": 5, "random_state": 42}
+    supports_update = True
+    supports_direct = True
+    native_multioutput = True
+    param_space = {
+        "n_estimators": [50, 100, 200],
+        "max_depth": [10, 20, None],
+        "min_samples_split": [2, 5, 10],
+        "max_features": [1.0, "sqrt", 0.3],
+    }
+
+    def build_estimator(self, n_samples=None):
+        return RandomForestRegressor(**self.params, n_jobs=self.n_jobs)
+
     def train(self, data, epochs=None, batch_size=None):
         x_train, y_train, scaled_data = self.prepare_data_sklearn(data)
-        # Use fixed hyperparameters to avoid timeout on Render
-        self.model = RandomForestRegressor(n_estimators=100, max_depth=20, min_samples_split=5, random_state=42, n_jobs=-1)
-        self.model.fit(x_train, y_train)
+        self.fit_estimator(x_train, y_train, scaled_data)
         class History:
             history = {'loss': [0]}
         return History(), scaled_data
 
-    def predict_future(self, data, days=30):
-        # Multivariate prediction logic
-        current_df = data.copy()
-        future_dates = []
-        predicted_prices = []
-        last_date = current_df['Date'].iloc[-1]
-        
-        for i in range(days):
-            dataset = current_df[self.feature_columns].values
-            scaled_data = self.scaler.transform(dataset)
-            
-            # Get last window and flatten
-            window = scaled_data[-self.look_back:, :]
-            current_batch = window.flatten().reshape(1, -1)
-            
-            # Predict
-            pred_scaled = self.model.predict(current_batch)[0]
-            
-            # Inverse transform
-            dummy_row = np.zeros((1, len(self.feature_columns)))
-            dummy_row[0, 0] = pred_scaled
-            pred_price = self.scaler.inverse_transform(dummy_row)[0, 0]
-            
-            predicted_prices.append(pred_price)
-            
-            # Next Date & Update DF
-            next_date = last_date + datetime.timedelta(days=1)
-            future_dates.append(next_date)
-            last_date = next_date
-            
-            new_row = {'Date': next_date, 'Close': pred_price}
-            new_df_row = pd.DataFrame([new_row])
-            current_df = pd.concat([current_df, new_df_row], ignore_index=True)
-            
-            # Re-calc indicators
-            current_df['SMA_20'] = current_df['Close'].rolling(window=20).mean()
-            current_df['SMA_50'] = current_df['Close'].rolling(window=50).mean()
-            current_df['EMA_12'] = current_df['Close'].ewm(span=12, adjust=False).mean()
-            current_df['EMA_26'] = current_df['Close'].ewm(span=26, adjust=False).mean()
-            
-            delta = current_df['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            current_df['RSI'] = 100 - (100 / (1 + rs))
-            
-            # MACD
-            current_df['MACD'] = current_df['EMA_12'] - current_df['EMA_26']
-            current_df['Signal_Line'] = current_df['MACD'].ewm(span=9, adjust=False).mean()
-            
-            # Bollinger Bands
-            std_dev = current_df['Close'].rolling(window=20).std()
-            current_df['Upper_Band'] = current_df['SMA_20'] + (std_dev * 2)
-            current_df['Lower_Band'] = current_df['SMA_20'] - (std_dev * 2)
-            
-            current_df = current_df.fillna(method='ffill')
-        
-        return future_dates, np.array(predicted_prices)
+    def update(self, data, new_bars):
+        # Grow the forest: only the added trees are fit, on the history including the new bars
+        x_train, y_train = self._update_windows(data)
+        extra = max(1, int(self.params["n_estimators"] * UPDATE_FRACTION))
+        self.model.set_params(warm_start=True, n_estimators=self.model.n_estimators + extra, n_jobs=self.n_jobs)
+        self.model.fit(x_train, y_train)
+        return 0
+
+
+class NystroemSVR(BaseEstimator, RegressorMixin):
+    """
+    Approximate RBF SVR: Nystroem features of the RBF kernel fed to a linear SVR.
+    Same C / gamma / epsilon meaning as SVR, but fit time grows linearly with samples
+    instead of quadratically to cubically, at the cost of n_components-rank accuracy.
+    """
+
+    def __init__(self, C=100, gamma="scale", epsilon=0.1, n_components=500, random_state=42, kernel="rbf"):
+        self.C = C
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.n_components = n_components
+        self.random_state = random_state
+        self.kernel = kernel
+
+    def fit(self, X, y):
+        gamma = self.gamma
+        if gamma == "scale":
+            # Same definition as SVR(gamma='scale')
+            variance = X.var()
+            gamma = 1.0 / (X.shape[1] * variance) if variance > 0 else 1.0
+        self.pipeline_ = make_pipeline(
+            Nystroem(kernel=self.kernel, gamma=gamma, n_components=min(self.n_components, len(X)), random_state=self.random_state),
+            LinearSVR(C=self.C, epsilon=self.epsilon, loss="epsilon_insensitive", dual=True, max_iter=5000, random_state=self.random_state)
+        )
+        self.pipeline_.fit(X, y)
+        return self
+
+    def predict(self, X):
+        return self.pipeline_.predict(X)
 
 
 class SVRPredictor(BasePredictor):
+    # Fixed hyperparameters for speed
+    default_params = {"kernel": "rbf", "C": 100, "gamma": "scale", "epsilon": 0.1}
+    supports_direct = True
+    param_space = {
+        "C": [1, 10, 100, 1000],
+        "gamma": ["scale", 0.001, 0.01, 0.1],
+        "epsilon": [0.01, 0.05, 0.1, 0.2],
+    }
+    # Exact SVR fit time explodes with sample count ('5y' / 'max' periods), so above
+    # SVR_APPROX_THRESHOLD training windows the kernel is approximated (see NystroemSVR)
+    solver = os.environ.get("SVR_SOLVER", "auto") # auto | exact | approx
+    approx_threshold = int(os.environ.get("SVR_APPROX_THRESHOLD", 1500))
+    approx_components = int(os.environ.get("SVR_APPROX_COMPONENTS", 500))
+
+    def hyperparameters(self):
+        return {**super().hyperparameters(), "solver": self.solver, "approx_threshold": self.approx_threshold,
+                "approx_components": self.approx_components}
+
+    def use_approximation(self, n_samples):
+        if self.solver == "auto":
+            return n_samples is not None and n_samples > self.approx_threshold
+        return self.solver == "approx"
+
+    def build_estimator(self, n_samples=None):
+        if self.use_approximation(n_samples):
+            return NystroemSVR(**self.params, n_components=self.approx_components)
+        return SVR(**self.params)
+
     def train(self, data, epochs=None, batch_size=None):
         x_train, y_train, scaled_data = self.prepare_data_sklearn(data)
-        # Use fixed hyperparameters for speed
-        self.model = SVR(kernel='rbf', C=100, gamma='scale', epsilon=0.1)
-        self.model.fit(x_train, y_train)
+        self.fit_estimator(x_train, y_train, scaled_data)
         class History:
             history = {'loss': [0]}
         return History(), scaled_data
 
-    def predict_future(self, data, days=30):
-        # Multivariate prediction logic
-        current_df = data.copy()
-        future_dates = []
-        predicted_prices = []
-        last_date = current_df['Date'].iloc[-1]
-        
-        for i in range(days):
-            dataset = current_df[self.feature_columns].values
-            scaled_data = self.scaler.transform(dataset)
-            
-            # Get last window and flatten
-            window = scaled_data[-self.look_back:, :]
-            current_batch = window.flatten().reshape(1, -1)
-            
-            # Predict
-            pred_scaled = self.model.predict(current_batch)[0]
-            
-            # Inverse transform
-            dummy_row = np.zeros((1, len(self.feature_columns)))
-            dummy_row[0, 0] = pred_scaled
-            pred_price = self.scaler.inverse_transform(dummy_row)[0, 0]
-            
-            predicted_prices.append(pred_price)
-            
-            # Next Date & Update DF
-            next_date = last_date + datetime.timedelta(days=1)
-            future_dates.append(next_date)
-            last_date = next_date
-            
-            new_row = {'Date': next_date, 'Close': pred_price}
-            new_df_row = pd.DataFrame([new_row])
-            current_df = pd.concat([current_df, new_df_row], ignore_index=True)
-            
-            # Re-calc indicators
-            current_df['SMA_20'] = current_df['Close'].rolling(window=20).mean()
-            current_df['SMA_50'] = current_df['Close'].rolling(window=50).mean()
-            current_df['EMA_12'] = current_df['Close'].ewm(span=12, adjust=False).mean()
-            current_df['EMA_26'] = current_df['Close'].ewm(span=26, adjust=False).mean()
-            
-            delta = current_df['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            current_df['RSI'] = 100 - (100 / (1 + rs))
-            
-            # MACD
-            current_df['MACD'] = current_df['EMA_12'] - current_df['EMA_26']
-            current_df['Signal_Line'] = current_df['MACD'].ewm(span=9, adjust=False).mean()
-            
-            # Bollinger Bands
-            std_dev = current_df['Close'].rolling(window=20).std()
-            current_df['Upper_Band'] = current_df['SMA_20'] + (std_dev * 2)
-            current_df['Lower_Band'] = current_df['SMA_20'] - (std_dev * 2)
-            
-            current_df = current_df.fillna(method='ffill')
-        
-        return future_dates, np.array(predicted_prices)
+
+class HistBoostingRegressor(BaseEstimator, RegressorMixin):
+    """
+    HistGradientBoostingRegressor with early stopping on a time-ordered validation split.
+    The built-in early stopping validates on a random split, which leaks the future into
+    training windows. Here the last validation_fraction of the rows (the most recent windows)
+    pick the number of iterations, then the model is refit on all rows with that many.
+    n_jobs caps its OpenMP threads (the estimator itself would use every core).
+    """
+
+    def __init__(self, learning_rate=0.1, max_depth=5, max_iter=500, validation_fraction=0.1,
+                 check_every=10, n_iter_no_change=3, random_state=42, n_jobs=None, max_leaf_nodes=31):
+        self.learning_rate = learning_rate
+        self.max_depth = max_depth
+        self.max_leaf_nodes = max_leaf_nodes
+        self.max_iter = max_iter
+        self.validation_fraction = validation_fraction
+        self.check_every = check_every
+        self.n_iter_no_change = n_iter_no_change
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+
+    def _threads(self):
+        from threadpoolctl import threadpool_limits
+        return threadpool_limits(limits=self.n_jobs if self.n_jobs and self.n_jobs > 0 else None, user_api="openmp")
+
+    def _model(self, max_iter, warm_start=False):
+        return HistGradientBoostingRegressor(
+            learning_rate=self.learning_rate, max_depth=self.max_depth, max_leaf_nodes=self.max_leaf_nodes, max_iter=max_iter,
+            early_stopping=False, warm_start=warm_start, random_state=self.random_state
+        )
+
+    def fit(self, X, y):
+        split = int(len(y) * (1 - self.validation_fraction))
+        best_iter = self.max_iter
+        with self._threads():
+            if 0 < split < len(y):
+                # Grow in steps of check_every iterations (up to max_iter), stop after
+                # n_iter_no_change steps without improvement
+                n_iter = min(self.check_every, self.max_iter)
+                model = self._model(n_iter, warm_start=True)
+                best_error, best_iter, stale = np.inf, n_iter, 0
+                while stale < self.n_iter_no_change:
+                    model.set_params(max_iter=n_iter)
+                    model.fit(X[:split], y[:split])
+                    error = np.mean((model.predict(X[split:]) - y[split:]) ** 2)
+                    if error < best_error:
+                        best_error, best_iter, stale = error, n_iter, 0
+                    else:
+                        stale += 1
+                    if n_iter >= self.max_iter:
+                        break
+                    n_iter = min(n_iter + self.check_every, self.max_iter)
+            self.n_iter_ = best_iter
+            self.model_ = self._model(best_iter).fit(X, y)
+        return self
+
+    def add_iterations(self, X, y, n):
+        # Warm-start n more iterations on (X, y), for incremental updates
+        self.n_iter_ += n
+        self.model_.set_params(warm_start=True, max_iter=self.n_iter_)
+        with self._threads():
+            self.model_.fit(X, y)
+        return self
+
+    def predict(self, X):
+        with self._threads():
+            return self.model_.predict(X)
 
 
 class GradientBoostingPredictor(BasePredictor):
+    window_dtype = np.float32
+    # Fixed hyperparameters for performance
+    default_params = {"n_estimators": 100, "learning_rate": 0.1, "max_depth": 5, "random_state": 42}
+    supports_update = True
+    supports_direct = True
+    exact_param_space = {
+        "n_estimators": [50, 100, 200],
+        "learning_rate": [0.03, 0.05, 0.1, 0.2],
+        "max_depth": [3, 4, 5, 6],
+        "subsample": [0.7, 0.85, 1.0],
+    }
+    # The hist engine sizes itself by early stopping and does not subsample
+    hist_param_space = {
+        "learning_rate": [0.03, 0.05, 0.1, 0.2],
+        "max_depth": [3, 4, 5, 6, None],
+        "max_leaf_nodes": [15, 31, 63],
+    }
+    # GB_ENGINE=hist: histogram-binned, multithreaded (OpenMP, capped at n_jobs) boosting with
+    # time-ordered early stopping; GB_HIST_MAX_ITER bounds its iterations. Default: exact engine.
+    engine = os.environ.get("GB_ENGINE", "exact") # exact | hist
+    hist_max_iter = int(os.environ.get("GB_HIST_MAX_ITER", 500))
+
+    @property
+    def param_space(self):
+        return self.hist_param_space if self.engine == "hist" else self.exact_param_space
+
+    def hyperparameters(self):
+        params = {**super().hyperparameters(), "engine": self.engine}
+        if self.engine == "hist":
+            params["hist_max_iter"] = self.hist_max_iter
+        return params
+
+    def build_estimator(self, n_samples=None):
+        if self.engine == "hist":
+            # n_estimators / subsample have no histogram counterpart: early stopping picks the size
+            return HistBoostingRegressor(
+                learning_rate=self.params["learning_rate"], max_depth=self.params["max_depth"],
+                max_leaf_nodes=self.params.get("max_leaf_nodes", 31),
+                max_iter=self.hist_max_iter, random_state=self.params.get("random_state"), n_jobs=self.n_jobs
+            )
+        return GradientBoostingRegressor(**self.params)
+
     def train(self, data, epochs=None, batch_size=None):
         x_train, y_train, scaled_data = self.prepare_data_sklearn(data)
-        # Fixed hyperparameters for performance
-        self.model = GradientBoostingRegressor(n_estimators=100, learning_rate=0.1, max_depth=5, random_state=42)
-        self.model.fit(x_train, y_train)
+        self.fit_estimator(x_train, y_train, scaled_data)
         class History:
             history = {'loss': [0]}
         return History(), scaled_data
 
-    def predict_future(self, data, days=30):
-        # Multivariate prediction logic
-        current_df = data.copy()
-        future_dates = []
-        predicted_prices = []
-        last_date = current_df['Date'].iloc[-1]
-        
-        for i in range(days):
-            dataset = current_df[self.feature_columns].values
-            scaled_data = self.scaler.transform(dataset)
-            
-            # Get last window and flatten
-            window = scaled_data[-self.look_back:, :]
-            current_batch = window.flatten().reshape(1, -1)
-            
-            # Predict
-            pred_scaled = self.model.predict(current_batch)[0]
-            
-            # Inverse transform
-            dummy_row = np.zeros((1, len(self.feature_columns)))
-            dummy_row[0, 0] = pred_scaled
-            pred_price = self.scaler.inverse_transform(dummy_row)[0, 0]
-            
-            predicted_prices.append(pred_price)
-            
-            # Next Date & Update DF
-            next_date = last_date + datetime.timedelta(days=1)
-            future_dates.append(next_date)
-            last_date = next_date
-            
-            new_row = {'Date': next_date, 'Close': pred_price}
-            new_df_row = pd.DataFrame([new_row])
-            current_df = pd.concat([current_df, new_df_row], ignore_index=True)
-            
-            # Re-calc indicators
-            current_df['SMA_20'] = current_df['Close'].rolling(window=20).mean()
-            current_df['SMA_50'] = current_df['Close'].rolling(window=50).mean()
-            current_df['EMA_12'] = current_df['Close'].ewm(span=12, adjust=False).mean()
-            current_df['EMA_26'] = current_df['Close'].ewm(span=26, adjust=False).mean()
-            
-            delta = current_df['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            current_df['RSI'] = 100 - (100 / (1 + rs))
-            
-            # MACD
-            current_df['MACD'] = current_df['EMA_12'] - current_df['EMA_26']
-            current_df['Signal_Line'] = current_df['MACD'].ewm(span=9, adjust=False).mean()
-            
-            # Bollinger Bands
-            std_dev = current_df['Close'].rolling(window=20).std()
-            current_df['Upper_Band'] = current_df['SMA_20'] + (std_dev * 2)
-            current_df['Lower_Band'] = current_df['SMA_20'] - (std_dev * 2)
-            
-            current_df = current_df.fillna(method='ffill')
-        
-        return future_dates, np.array(predicted_prices)
+    def update(self, data, new_bars):
+        # Append boosting stages fit to the current ensemble's residuals on the extended history
+        x_train, y_train = self._update_windows(data)
+        if isinstance(self.model, HistBoostingRegressor):
+            self.model.n_jobs = self.n_jobs # Cores of this update, not of the original fit
+            self.model.add_iterations(x_train, y_train, max(1, int(self.model.n_iter_ * UPDATE_FRACTION)))
+            return 0
+        extra = max(1, int(self.params["n_estimators"] * UPDATE_FRACTION))
+        self.model.set_params(warm_start=True, n_estimators=self.model.n_estimators + extra)
+        self.model.fit(x_train, y_train)
+        return float(self.model.train_score_[-1])
 
 class MonteCarloPredictor(BasePredictor):
     def train(self, data, epochs=None, batch_size=None):
@@ -619,14 +1026,15 @@ class MonteCarloPredictor(BasePredictor):
             history = {'loss': [0]}
         return History(), None # No scaling needed for MC really, but interface expects it
 
-    def backtest(self, data, split_ratio=0.8):
+    def backtest(self, data, split_ratio=0.8, fit=True):
         # 1. Split data
         train_size = int(len(data) * split_ratio)
         train_data = data.iloc[:train_size]
         test_data = data.iloc[train_size:]
         
         # 2. Train (calculate stats) on train_data
-        self.train(train_data)
+        if fit:
+            self.train(train_data)
         
         # 3. Predict for test duration (treat steps as trading days)
         days = len(test_data)
@@ -680,6 +1088,13 @@ class MonteCarloPredictor(BasePredictor):
             }
         }
 
+    def walk_forward_fold(self, data, train_start, test_start, test_end):
+        # Like backtest(): the GBM mean path from the last training close across the fold
+        train_data = data.iloc[train_start:test_start]
+        self.train(train_data)
+        _, mean_path, _ = self.predict_paths(train_data, days=test_end - test_start, iterations=1000, method="gbm")
+        return np.asarray(mean_path)
+
     def predict_future(self, data, days=30):
         # Generate simulations
         iterations = 1000
@@ -930,18 +1345,27 @@ class MonteCarloPredictor(BasePredictor):
         
         return future_dates, mean_path, paths_list
 
-def get_predictor(model_type: str):
+def parse_members(spec):
+    """'random_forest=2,svr=1' -> {'random_forest': 2.0, 'svr': 1.0} (weight defaults to 1)."""
+    members = {}
+    for part in (spec or "").split(","):
+        name, _, weight = part.partition("=")
+        if name.strip():
+            members[name.strip()] = float(weight or 1)
+    return members
+
+def get_predictor(model_type: str, **kwargs):
     if model_type == "lstm":
-        return LSTMPredictor()
+        return LSTMPredictor(**kwargs)
     elif model_type == "random_forest":
-        return RandomForestPredictor()
+        return RandomForestPredictor(**kwargs)
     elif model_type == "svr":
-        return SVRPredictor()
+        return SVRPredictor(**kwargs)
     elif model_type == "gradient_boosting":
-        return GradientBoostingPredictor()
+        return GradientBoostingPredictor(**kwargs)
     elif model_type == "monte_carlo":
-        return MonteCarloPredictor()
+        return MonteCarloPredictor(**kwargs)
     elif model_type == "ensemble":
-        return EnsemblePredictor()
+        return EnsemblePredictor(**kwargs)
     else:
         raise ValueError(f"Unknown model type: {model_type}")
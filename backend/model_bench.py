@@ -0,0 +1,107 @@
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+# Accuracy / runtime benchmark of model engine variants on real-sized histories.
+# Each variant is trained on the first 80% of the training windows of a ticker's history and
+# scored on the remaining 20% (time-ordered), per period, so engines can be compared as the
+# sample count grows:
+#
+#   STUB_PROVIDER=1 python -m backend.model_bench --variants svr_exact,svr_approx --periods 2y,5y,max
+#   STUB_PROVIDER=1 python -m backend.model_bench --variants gb_exact,gb_hist
+#
+# Without STUB_PROVIDER the configured real providers are used (or CASSETTE_MODE=replay).
+
+# variant -> (model_type, attributes set on the predictor before building its estimator)
+VARIANTS = {
+    "svr_exact": ("svr", {"solver": "exact"}),
+    "svr_approx": ("svr", {"solver": "approx"}),
+    "gb_exact": ("gradient_boosting", {"engine": "exact"}),
+    "gb_hist": ("gradient_boosting", {"engine": "hist"}),
+}
+DEFAULT_VARIANTS = "svr_exact,svr_approx,gb_exact,gb_hist"
+
+
+def bench_variant(variant, data, holdout=0.2):
+    from backend.model import get_predictor
+
+    model_type, attributes = VARIANTS[variant]
+    predictor = get_predictor(model_type)
+    for name, value in attributes.items():
+        setattr(predictor, name, value)
+
+    x, y, _ = predictor.prepare_data_sklearn(data)
+    split = int(len(y) * (1 - holdout))
+    estimator = predictor.build_estimator(split)
+
+    start = time.perf_counter()
+    estimator.fit(x[:split], y[:split])
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pred_scaled = estimator.predict(x[split:])
+    predict_seconds = time.perf_counter() - start
+
+    # Errors in price units
+    scale, offset = predictor.scaler.scale_[0], predictor.scaler.min_[0]
+    predicted = (pred_scaled - offset) / scale
+    actual = (y[split:] - offset) / scale
+    return {
+        "variant": variant,
+        "estimator": type(estimator).__name__,
+        "train_samples": split,
+        "test_samples": len(y) - split,
+        "fit_seconds": round(fit_seconds, 4),
+        "predict_seconds": round(predict_seconds, 4),
+        "predict_us_per_row": round(predict_seconds / max(1, len(y) - split) * 1e6, 2),
+        "mae": round(float(np.mean(np.abs(predicted - actual))), 4),
+        "rmse": round(float(np.sqrt(np.mean((predicted - actual) ** 2))), 4),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark model engine variants (accuracy and runtime)")
+    parser.add_argument("--variants", default=DEFAULT_VARIANTS, help=f"comma-separated, from: {','.join(VARIANTS)}")
+    parser.add_argument("--tickers", default="AAPL,SPY")
+    parser.add_argument("--periods", default="2y,5y,max")
+    parser.add_argument("--holdout", type=float, default=0.2, help="share of the windows held out for scoring")
+    parser.add_argument("--output", default="model_bench.json")
+    args = parser.parse_args(argv)
+
+    from backend.data_service import fetch_stock_data
+
+    variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+    unknown = [v for v in variants if v not in VARIANTS]
+    if unknown:
+        parser.error(f"unknown variants: {', '.join(unknown)}")
+
+    results = []
+    header = f"{'ticker':<7} {'period':<6} {'variant':<16} {'samples':>7} {'fit s':>9} {'pred us/row':>11} {'mae':>9} {'rmse':>9}"
+    print(header)
+    print("-" * len(header))
+    for ticker in [t.strip().upper() for t in args.tickers.split(",") if t.strip()]:
+        for period in [p.strip() for p in args.periods.split(",") if p.strip()]:
+            data = fetch_stock_data(ticker, period=period)
+            for variant in variants:
+                r = {"ticker": ticker, "period": period, **bench_variant(variant, data, args.holdout)}
+                results.append(r)
+                print(f"{ticker:<7} {period:<6} {variant:<16} {r['train_samples']:>7} {r['fit_seconds']:>9.3f} "
+                      f"{r['predict_us_per_row']:>11.1f} {r['mae']:>9.3f} {r['rmse']:>9.3f}")
+
+    report = {
+        "config": vars(args),
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n-> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
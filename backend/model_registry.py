@@ -0,0 +1,322 @@
+import collections
+import copy
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+from backend.metrics import register_collector, CACHE_HITS, CACHE_MISSES, CACHE_SIZE, MODEL_FITS
+
+# Registry of fitted predictors (estimator plus fitted MinMaxScaler), so repeat forecasts
+# for the same ticker and data skip training. Entries are keyed by
+# (ticker, model_type, hyperparameters, data fingerprint) and live in a byte-bounded
+# in-memory LRU backed by files on disk, loaded lazily on a memory miss:
+#   MODEL_REGISTRY_DIR        on-disk store (default ./model_registry), <model_type>/<key>.pkl + .json
+#   MODEL_REGISTRY_DISK       1 (default) to persist entries, 0 for memory only
+#   MODEL_REGISTRY_MEMORY_MB  memory budget for the LRU (serialized size), default 256
+#   MODEL_REGISTRY_DISK_MB    disk budget; least recently used entries are deleted beyond it, default 1024
+# Entries written by another format version or scikit-learn version are ignored and removed.
+#
+# When newer data arrives for a (ticker, model_type, hyperparameters) lineage, the latest fit
+# of that lineage is warm-started with the new bars if the predictor's policy allows it
+# (BasePredictor.plan_update), instead of being refit from scratch.
+
+REGISTRY_DIR = os.environ.get("MODEL_REGISTRY_DIR", "model_registry")
+DISK_ENABLED = os.environ.get("MODEL_REGISTRY_DISK", "1") == "1"
+MEMORY_BYTES = int(float(os.environ.get("MODEL_REGISTRY_MEMORY_MB", 256)) * 1024 * 1024)
+DISK_BYTES = int(float(os.environ.get("MODEL_REGISTRY_DISK_MB", 1024)) * 1024 * 1024)
+
+DISK_SWEEP_INTERVAL = 600 # Seconds between full disk sweeps; writes of other workers are only seen by one
+
+FORMAT_VERSION = 3 # 2: predictors track trained_through / updates for warm starts; 3: and trained_from
+
+
+def _sklearn_version():
+    import sklearn
+    return sklearn.__version__
+
+
+def _atomic_write(path, data, mode):
+    # Unique temp file per write: forked workers may write the same entry at the same time
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def registry_key(ticker: str, model_type: str, hyperparameters: dict, fingerprint: str):
+    """Stable digest of everything that determines a fitted model."""
+    identity = {
+        "ticker": ticker.upper(),
+        "model_type": model_type,
+        "hyperparameters": hyperparameters,
+        "fingerprint": fingerprint,
+    }
+    return hashlib.sha1(json.dumps(identity, sort_keys=True, default=str).encode()).hexdigest()[:24]
+
+
+class ModelRegistry:
+    def __init__(self, directory=REGISTRY_DIR, memory_bytes=MEMORY_BYTES, persist=DISK_ENABLED, disk_bytes=DISK_BYTES):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._disk_used = None # Estimated on-disk total (None: not measured yet)
+        self._last_sweep = 0.0
+        self.persist = persist
+        self._memory = collections.OrderedDict() # key -> (predictor, meta), most recent last
+        self._memory_used = 0
+        self._lock = threading.Lock()
+        self._training = {} # key -> lock, so concurrent requests train a model once
+        self._latest = {} # lineage -> key of its most recent fit
+        self.hits = 0
+        self.misses = 0
+
+    def _paths(self, model_type, key):
+        base = os.path.join(self.directory, model_type, key)
+        return f"{base}.pkl", f"{base}.json"
+
+    def _remember(self, key, predictor, meta):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = (predictor, meta)
+            self._memory_used += meta["bytes"]
+            # Evict least recently used entries; they stay on disk
+            while self._memory_used > self.memory_bytes and len(self._memory) > 1:
+                _, (_, evicted) = self._memory.popitem(last=False)
+                self._memory_used -= evicted["bytes"]
+
+    def _from_memory(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            return entry
+
+    def _from_disk(self, model_type, key):
+        if not self.persist:
+            return None
+        payload_path, meta_path = self._paths(model_type, key)
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta.get("format") != FORMAT_VERSION or meta.get("sklearn") != _sklearn_version():
+                # Written by another version: pickles are not portable across sklearn releases
+                self._discard(payload_path, meta_path)
+                return None
+            with open(payload_path, "rb") as f:
+                predictor = pickle.load(f)
+            os.utime(meta_path) # Recency for disk eviction
+        except Exception as e:
+            print(f"Model registry: dropping unreadable entry {key}: {e}")
+            self._discard(payload_path, meta_path)
+            return None
+        self._remember(key, predictor, meta)
+        return predictor, meta
+
+    def _lineage_path(self, model_type, lineage):
+        return os.path.join(self.directory, model_type, f"{lineage}.latest")
+
+    def _set_latest(self, model_type, lineage, key):
+        with self._lock:
+            previous = self._latest.get(lineage)
+            self._latest[lineage] = key
+        if self.persist:
+            path = self._lineage_path(model_type, lineage)
+            if previous is None:
+                try:
+                    with open(path) as f:
+                        previous = f.read().strip()
+                except OSError:
+                    pass
+            try:
+                _atomic_write(path, key, "w")
+            except OSError:
+                pass
+            if previous and previous != key:
+                # Superseded fit of the lineage (older data version): nothing will ask for it again
+                self._discard(*self._paths(model_type, previous))
+
+    def _account_disk(self, written):
+        # Writes are added to an estimate; the directory is only walked once the estimate crosses
+        # the budget (or every DISK_SWEEP_INTERVAL, to pick up what other workers wrote)
+        with self._lock:
+            if self._disk_used is not None:
+                self._disk_used += written
+            sweep = (self._disk_used is None or self._disk_used > self.disk_bytes
+                     or time.monotonic() - self._last_sweep > DISK_SWEEP_INTERVAL)
+            if sweep:
+                self._last_sweep = time.monotonic()
+        if sweep:
+            used = self._enforce_disk_budget()
+            with self._lock:
+                self._disk_used = used
+
+    def _enforce_disk_budget(self):
+        # Delete the least recently used payload/meta pairs until the store fits disk_bytes.
+        # Returns the bytes left on disk.
+        entries, used = [], 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                meta_path = os.path.join(root, name)
+                payload_path = meta_path[:-len(".json")] + ".pkl"
+                try:
+                    size = os.path.getsize(meta_path) + os.path.getsize(payload_path)
+                    entries.append((os.path.getmtime(meta_path), size, payload_path, meta_path))
+                except OSError:
+                    continue
+                used += size
+        for _, size, payload_path, meta_path in sorted(entries):
+            if used <= self.disk_bytes:
+                break
+            self._discard(payload_path, meta_path)
+            used -= size
+        return used
+
+    def _get_latest(self, model_type, lineage):
+        """Most recent (predictor, meta) of a lineage, if any."""
+        key = self._latest.get(lineage)
+        if key is None and self.persist:
+            try:
+                with open(self._lineage_path(model_type, lineage)) as f:
+                    key = f.read().strip()
+            except OSError:
+                return None
+        if key is None:
+            return None
+        return self._from_memory(key) or self._from_disk(model_type, key)
+
+    def _discard(self, *paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def get(self, model_type: str, key: str):
+        """(predictor, meta) for a key, or None. Checks memory first, then disk."""
+        entry = self._from_memory(key) or self._from_disk(model_type, key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, model_type: str, key: str, predictor, meta: dict):
+        try:
+            payload = pickle.dumps(predictor, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            # e.g. a Keras model that cannot be pickled: serve it uncached
+            print(f"Model registry: {model_type} is not serializable, not caching: {e}")
+            return
+        meta = {**meta, "format": FORMAT_VERSION, "sklearn": _sklearn_version(), "bytes": len(payload)}
+        if self.persist:
+            payload_path, meta_path = self._paths(model_type, key)
+            try:
+                os.makedirs(os.path.dirname(payload_path), exist_ok=True)
+                # Payload first, metadata last: an entry only counts once its .json exists
+                _atomic_write(payload_path, payload, "wb")
+                meta_json = json.dumps(meta, default=str)
+                _atomic_write(meta_path, meta_json, "w")
+                self._account_disk(len(payload) + len(meta_json))
+            except OSError as e:
+                print(f"Model registry: could not persist {key}: {e}")
+        self._remember(key, predictor, meta)
+
+    def get_or_train(self, ticker: str, model_type: str, fingerprint: str, build, train, data=None):
+        """
+        Fitted predictor for a ticker's dataset, training it only on a registry miss.
+        Args:
+            ticker: Stock symbol
+            model_type: Predictor name as accepted by get_predictor
+            fingerprint: Content fingerprint of the training data (data_service.data_version)
+            build: Zero-argument callable returning an unfitted predictor
+            train: Callable fitting that predictor; returns its training loss (or None)
+            data: The training data itself; enables warm-start updates of the lineage's latest fit
+        Returns:
+            (predictor, meta) where meta holds the training loss and time, and how it was fit
+        """
+        predictor = build()
+        hyperparameters = predictor.hyperparameters()
+        key = registry_key(ticker, model_type, hyperparameters, fingerprint)
+        # A lineage is one history (same first bar) growing at the end: a fit on 5y must not be
+        # warm-started with a 2y request, nor the other way round
+        first_bar = str(data['Date'].iloc[0]) if data is not None else None
+        lineage = registry_key(ticker, model_type, hyperparameters, f"lineage:{first_bar}")
+        entry = self.get(model_type, key)
+        if entry is not None:
+            # The cached fit keeps the n_jobs it was trained with; run with this request's cores
+            return entry[0].with_cores(predictor.n_jobs), entry[1]
+
+        with self._lock:
+            key_lock = self._training.setdefault(key, threading.Lock())
+        with key_lock:
+            try:
+                # Another request may have trained it while we waited
+                entry = self._from_memory(key)
+                if entry is not None:
+                    return entry[0].with_cores(predictor.n_jobs), entry[1]
+                start = time.perf_counter()
+                kind, reason = "full", "no previous fit"
+                previous = self._get_latest(model_type, lineage) if data is not None else None
+                if previous is not None:
+                    new_bars, reason = previous[0].plan_update(data)
+                    if reason is None:
+                        # Update a copy: the previous fit may be serving other requests
+                        updated = copy.deepcopy(previous[0])
+                        updated.n_jobs = predictor.n_jobs
+                        loss = updated.update(data, new_bars)
+                        predictor, kind = updated, "incremental"
+                        reason = f"{new_bars} new bars"
+                if kind == "full":
+                    loss = train(predictor)
+                if data is not None:
+                    predictor.mark_trained(data, updated=kind == "incremental")
+                MODEL_FITS.inc(model=model_type, kind=kind)
+                meta = {
+                    "ticker": ticker.upper(),
+                    "model_type": model_type,
+                    "fingerprint": fingerprint,
+                    "hyperparameters": predictor.hyperparameters(),
+                    "loss": loss,
+                    "fit": kind,
+                    "fit_reason": reason,
+                    "updates_since_refit": predictor.updates,
+                    "trained_at": time.time(),
+                    "train_seconds": round(time.perf_counter() - start, 4),
+                }
+                self.put(model_type, key, predictor, meta)
+                if data is not None:
+                    self._set_latest(model_type, lineage, key)
+            finally:
+                # Drop the lock while still holding it, once the entry is in memory; only our
+                # own lock, as a caller that arrived meanwhile may have registered a new one
+                with self._lock:
+                    if self._training.get(key) is key_lock:
+                        del self._training[key]
+        return predictor, meta
+
+
+model_registry = ModelRegistry()
+
+
+@register_collector
+def _collect_registry_stats():
+    CACHE_HITS.set(model_registry.hits, cache="model_registry")
+    CACHE_MISSES.set(model_registry.misses, cache="model_registry")
+    CACHE_SIZE.set(len(model_registry._memory), cache="model_registry")
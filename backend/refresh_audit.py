@@ -0,0 +1,113 @@
+import argparse
+import copy
+import json
+import sys
+import time
+
+import numpy as np
+
+# Accuracy drift of warm-start updates against a full refit.
+# For each ticker and model: fit on the history up to `new_bars + holdout` bars ago, warm-start
+# it with the `new_bars` newer bars (BasePredictor.update), and separately refit from scratch on
+# the same data. Both are scored on one-step predictions over the last `holdout` bars, and their
+# forecasts are compared, alongside the time each path took.
+#
+#   STUB_PROVIDER=1 python -m backend.refresh_audit --tickers AAPL,MSFT --new-bars 1
+#
+# Without STUB_PROVIDER the configured real providers are used (or CASSETTE_MODE=replay).
+
+DEFAULT_MODELS = "random_forest,gradient_boosting"
+
+
+def holdout_mae(predictor, data, holdout):
+    """Mean absolute error (price units) of one-step predictions for the last `holdout` bars."""
+    from backend.model import window_view, LSTMPredictor
+
+    lstm = isinstance(predictor, LSTMPredictor)
+    scaled = predictor.scaler.transform(data[predictor.feature_columns].values)
+    windows = window_view(scaled, predictor.look_back, flatten=not lstm)[-holdout:]
+    if lstm:
+        pred_scaled = predictor.model.predict(windows, verbose=0).reshape(-1)
+    else:
+        pred_scaled = predictor.model.predict(windows)
+    predicted = (pred_scaled - predictor.scaler.min_[0]) / predictor.scaler.scale_[0]
+    actual = data['Close'].values[-holdout:]
+    return float(np.mean(np.abs(predicted - actual)))
+
+
+def audit(model_type, data, new_bars=1, holdout=20, days=30):
+    from backend.model import get_predictor
+
+    current = data.iloc[:len(data) - holdout]
+    previous = current.iloc[:len(current) - new_bars]
+
+    base = get_predictor(model_type)
+    base.train(previous)
+    base.mark_trained(previous)
+    planned, reason = base.plan_update(current)
+
+    result = {"model": model_type, "new_bars": new_bars, "holdout": holdout}
+    if reason is not None:
+        result["skipped"] = reason
+        return result
+
+    start = time.perf_counter()
+    incremental = copy.deepcopy(base)
+    incremental.update(current, planned)
+    result["update_seconds"] = round(time.perf_counter() - start, 4)
+
+    start = time.perf_counter()
+    full = get_predictor(model_type)
+    full.train(current)
+    result["refit_seconds"] = round(time.perf_counter() - start, 4)
+    result["cost_ratio"] = round(result["update_seconds"] / result["refit_seconds"], 4)
+
+    mae_update = holdout_mae(incremental, data, holdout)
+    mae_refit = holdout_mae(full, data, holdout)
+    result["mae_update"] = round(mae_update, 4)
+    result["mae_refit"] = round(mae_refit, 4)
+    result["mae_drift_pct"] = round((mae_update - mae_refit) / mae_refit * 100, 2) if mae_refit else None
+
+    # How far apart the two models' forecasts end up
+    _, forecast_update = incremental.predict_future(current, days)
+    _, forecast_refit = full.predict_future(current, days)
+    result["forecast_gap_pct"] = round(float(np.mean(np.abs(forecast_update - forecast_refit) / forecast_refit)) * 100, 3)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare warm-start model updates with full refits")
+    parser.add_argument("--tickers", default="AAPL,MSFT,SPY")
+    parser.add_argument("--models", default=DEFAULT_MODELS)
+    parser.add_argument("--period", default="2y")
+    parser.add_argument("--new-bars", type=int, default=1, help="bars added between the two fits")
+    parser.add_argument("--holdout", type=int, default=20, help="most recent bars used for scoring")
+    parser.add_argument("--days", type=int, default=30, help="forecast horizon for the forecast gap")
+    parser.add_argument("--output", default="refresh_audit.json")
+    args = parser.parse_args(argv)
+
+    from backend.data_service import fetch_stock_data
+
+    results = []
+    header = f"{'ticker':<8} {'model':<18} {'update s':>9} {'refit s':>9} {'cost':>6} {'mae upd':>9} {'mae refit':>9} {'drift':>8} {'gap':>7}"
+    print(header)
+    print("-" * len(header))
+    for ticker in [t.strip().upper() for t in args.tickers.split(",") if t.strip()]:
+        data = fetch_stock_data(ticker, period=args.period)
+        for model_type in [m.strip() for m in args.models.split(",") if m.strip()]:
+            r = {"ticker": ticker, **audit(model_type, data, args.new_bars, args.holdout, args.days)}
+            results.append(r)
+            if "skipped" in r:
+                print(f"{ticker:<8} {model_type:<18} skipped: {r['skipped']}")
+                continue
+            print(f"{ticker:<8} {model_type:<18} {r['update_seconds']:>9.3f} {r['refit_seconds']:>9.3f} {r['cost_ratio']:>6.2f} "
+                  f"{r['mae_update']:>9.3f} {r['mae_refit']:>9.3f} {r['mae_drift_pct'] or 0:>+7.1f}% {r['forecast_gap_pct']:>6.2f}%")
+
+    with open(args.output, "w") as f:
+        json.dump({"config": vars(args), "results": results}, f, indent=2)
+    print(f"\n-> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
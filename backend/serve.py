@@ -0,0 +1,138 @@
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+# Preforked multi-worker server.
+# The parent imports the app and its heavy modules and warms read-only state (pinned
+# history snapshots, their fingerprints, and models fitted on them in the model registry)
+# once, then forks the workers. Workers share those memory pages copy-on-write instead of
+# each importing sklearn/pandas and warming caches on their own, so more workers fit in the
+# same RAM. Pinned histories are served for WARM_MAX_AGE seconds (data_service.warm_frames).
+#
+#   WEB_CONCURRENCY=4 WARM_TICKERS=AAPL,MSFT,SPY WARM_MODELS=random_forest python -m backend.serve
+#
+# Unlike `uvicorn --workers` (which spawns fresh interpreters), this relies on fork(),
+# so it is POSIX only.
+
+HOST = os.environ.get("HOST", "0.0.0.0")
+PORT = int(os.environ.get("PORT", 8000))
+WORKERS = int(os.environ.get("WEB_CONCURRENCY", 2))
+WARM_TICKERS = [t.strip().upper() for t in os.environ.get("WARM_TICKERS", "").split(",") if t.strip()]
+WARM_PERIOD = os.environ.get("WARM_PERIOD", "2y")
+WARM_MODELS = [m.strip() for m in os.environ.get("WARM_MODELS", "random_forest").split(",") if m.strip()]
+
+# Split the model CPU budget between workers unless configured explicitly
+os.environ.setdefault("MODEL_CPU_BUDGET", str(max(1, (os.cpu_count() or 1) // WORKERS)))
+
+
+def warm_state():
+    """Load everything workers only ever read. Runs once, in the parent, before forking."""
+    from backend.lazy import timed_import
+    from backend.data_service import pin_stock_data, data_version
+    from backend.main import get_predictor, train_loss
+    from backend.model_registry import model_registry
+    from backend.tuning import tuning_service
+
+    for name in ("backend.model", "yfinance", "vaderSentiment.vaderSentiment"):
+        try:
+            timed_import(name)
+        except Exception as e:
+            print(f"[serve] preload of {name} failed: {e}")
+
+    for ticker in WARM_TICKERS:
+        try:
+            data = pin_stock_data(ticker, period=WARM_PERIOD)
+            version = data_version(data)
+        except Exception as e:
+            print(f"[serve] warm-up of {ticker} failed: {e}")
+            continue
+        for model_name in WARM_MODELS:
+            # Same registry entry run_prediction looks up. Single-threaded fits: no thread or
+            # OpenMP pools may exist in the parent when it forks.
+            params = tuning_service.best_params(ticker, model_name)
+            try:
+                model_registry.get_or_train(
+                    ticker, model_name, version,
+                    lambda: get_predictor(model_name, n_jobs=1, params=params),
+                    lambda predictor: train_loss(predictor.train(data, epochs=20)[0]), data=data
+                )
+            except Exception as e:
+                print(f"[serve] warm-up of {ticker} {model_name} failed: {e}")
+
+
+def run_worker(sock):
+    import uvicorn
+    from backend.main import app
+
+    # Workers exit on SIGTERM/SIGINT through uvicorn's own handlers
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(app, log_level=os.environ.get("LOG_LEVEL", "info"))
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def spawn(sock):
+    pid = os.fork()
+    if pid == 0:
+        try:
+            run_worker(sock)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def main():
+    started = time.perf_counter()
+    from backend.main import app  # noqa: F401  (import the app in the parent)
+    warm_state()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((HOST, PORT))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    # Move everything allocated so far out of the GC's reach: collections in the
+    # workers would otherwise write to these objects' headers and un-share their pages
+    gc.collect()
+    gc.freeze()
+    print(f"[serve] parent ready in {time.perf_counter() - started:.1f}s, forking {WORKERS} workers on {HOST}:{PORT}")
+
+    workers = {spawn(sock) for _ in range(WORKERS)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    # Supervise: replace workers that die, until asked to stop
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.discard(pid)
+        if not stopping:
+            print(f"[serve] worker {pid} exited with status {status}, restarting")
+            time.sleep(1) # Avoid a tight crash loop
+            workers.add(spawn(sock))
+
+    sock.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import traceback
+
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from backend.executor import core_budget, submit_with_cores
+
+# Streaming response mode for multi-model endpoints: each model's result is sent
+# as its own event as soon as it finishes, followed by a closing summary event.
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+def _json_default(obj):
+    # numpy scalars / arrays and pandas timestamps
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    return str(obj)
+
+
+def format_event(event: str, payload: dict, fmt: str = "ndjson"):
+    """Encode one event as an NDJSON line or an SSE frame."""
+    if fmt == "sse":
+        return f"event: {event}\ndata: {json.dumps(payload, default=_json_default)}\n\n"
+    return json.dumps({"event": event, **payload}, default=_json_default) + "\n"
+
+
+def stream_model_results(model_names, run_model, build_summary, fmt: str = "ndjson"):
+    """
+    Runs run_model(name, n_jobs) for every model in parallel and streams results in completion order.
+    Args:
+        model_names: Models to run
+        run_model: Blocking callable returning the result dict for one model
+        build_summary: Blocking callable receiving the list of results, returning summary fields
+        fmt: 'ndjson' or 'sse'
+    Returns:
+        StreamingResponse emitting 'result' / 'error' events then one 'summary' event.
+    """
+    def start_jobs():
+        wanted = core_budget.share(len(model_names))
+        return {submit_with_cores(run_model, name, wanted): name for name in model_names}
+
+    return stream_jobs(start_jobs, build_summary, fmt, name_key="model")
+
+
+def stream_jobs(start_jobs, build_summary, fmt: str = "ndjson", name_key: str = "model"):
+    """
+    Streams the results of already-scheduled awaitables in completion order.
+    Args:
+        start_jobs: Callable returning {awaitable: name}; called once the stream starts
+        build_summary: Blocking callable receiving the list of results, returning summary fields
+        fmt: 'ndjson' or 'sse'
+        name_key: Field identifying a job in results and error events ('model', 'ticker', ...)
+    """
+    if fmt not in MEDIA_TYPES:
+        raise ValueError(f"Unknown stream format: {fmt}")
+
+    async def events():
+        pending = {asyncio.ensure_future(job): name for job, name in start_jobs().items()}
+        results = []
+        errors = []
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        traceback.print_exc()
+                        errors.append({name_key: name, "detail": str(e)})
+                        yield format_event("error", errors[-1], fmt)
+                        continue
+                    results.append(result)
+                    yield format_event("result", result, fmt)
+
+            summary = await run_in_threadpool(build_summary, results)
+            summary.update({
+                f"{name_key}s": [r[name_key] for r in results],
+                "errors": errors,
+            })
+            yield format_event("summary", summary, fmt)
+        finally:
+            # Client disconnected: don't leave orphaned tasks behind
+            for task in pending:
+                task.cancel()
+
+    return StreamingResponse(events(), media_type=MEDIA_TYPES[fmt])
@@ -0,0 +1,139 @@
+import hashlib
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Local stub market-data provider for load tests and offline runs.
+# When STUB_PROVIDER=1 every data path (history, current price, quotes, news) is served
+# from here instead of yfinance / Alpha Vantage / Finnhub / Polygon / Google News:
+#   STUB_DATA_DIR    directory of recorded bars, one <TICKER>.csv (Date,Open,High,Low,Close,Volume)
+#                    per symbol; tickers without a file get deterministic synthetic bars
+#   STUB_LATENCY_MS  mean simulated upstream latency (exponentially distributed)
+#   STUB_ERROR_RATE  probability in [0, 1] that a call fails like an upstream error
+
+ENABLED = os.environ.get("STUB_PROVIDER", "0") == "1"
+DATA_DIR = os.environ.get("STUB_DATA_DIR")
+LATENCY_MS = float(os.environ.get("STUB_LATENCY_MS", 0))
+ERROR_RATE = float(os.environ.get("STUB_ERROR_RATE", 0))
+
+PERIOD_DAYS = {"1mo": 30, "3mo": 90, "6mo": 180, "1y": 365, "2y": 730, "5y": 1825, "max": 3650}
+
+
+class StubProviderError(Exception):
+    pass
+
+
+def _ticker_seed(ticker: str):
+    return int(hashlib.md5(ticker.upper().encode()).hexdigest()[:8], 16)
+
+
+def _simulate_upstream():
+    if LATENCY_MS > 0:
+        time.sleep(random.expovariate(1.0 / LATENCY_MS) / 1000.0)
+    if ERROR_RATE > 0 and random.random() < ERROR_RATE:
+        raise StubProviderError("Stub provider injected error")
+
+
+def _synthetic_bars(ticker: str, days: int):
+    # Same ticker -> same series, so runs are reproducible
+    rng = np.random.default_rng(_ticker_seed(ticker))
+    dates = pd.bdate_range(end=datetime.now().date(), periods=days)
+    base_price = 20 + (_ticker_seed(ticker) % 480)
+    returns = rng.normal(0.0003, 0.018, days)
+    close = base_price * np.exp(np.cumsum(returns))
+    open_ = close * (1 + rng.normal(0, 0.004, days))
+    spread = np.abs(rng.normal(0, 0.01, days))
+    return pd.DataFrame({
+        'Date': dates,
+        'Open': open_,
+        'High': np.maximum(open_, close) * (1 + spread),
+        'Low': np.minimum(open_, close) * (1 - spread),
+        'Close': close,
+        'Volume': rng.integers(1_000_000, 20_000_000, days).astype(float)
+    })
+
+
+def _recorded_bars(ticker: str):
+    if not DATA_DIR:
+        return None
+    path = os.path.join(DATA_DIR, f"{ticker.upper()}.csv")
+    if not os.path.exists(path):
+        return None
+    df = pd.read_csv(path, parse_dates=['Date'])
+    return df[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']].sort_values('Date').reset_index(drop=True)
+
+
+def fetch_history(ticker: str, period: str = "2y"):
+    """Raw daily bars (no indicators), like a provider response."""
+    _simulate_upstream()
+    days = PERIOD_DAYS.get(period, 730)
+    bars = _recorded_bars(ticker)
+    if bars is None:
+        # Trading days only, and at least 6 months so the 60-day look_back still works
+        return _synthetic_bars(ticker, max(126, int(days * 252 / 365)))
+    if period == "max":
+        return bars
+    cutoff = bars['Date'].iloc[-1] - timedelta(days=days)
+    return bars[bars['Date'] >= cutoff].reset_index(drop=True)
+
+
+def current_price(ticker: str):
+    _simulate_upstream()
+    bars = _recorded_bars(ticker)
+    if bars is None:
+        bars = _synthetic_bars(ticker, 126)
+    return float(bars['Close'].iloc[-1])
+
+
+def quote(ticker: str):
+    _simulate_upstream()
+    bars = _recorded_bars(ticker)
+    if bars is None:
+        bars = _synthetic_bars(ticker, 126)
+    price = float(bars['Close'].iloc[-1])
+    previous_close = float(bars['Close'].iloc[-2])
+    return {
+        "ticker": ticker,
+        "price": price,
+        "change": price - previous_close,
+        "change_percent": (price - previous_close) / previous_close * 100,
+        "volume": float(bars['Volume'].iloc[-1]),
+        "previous_close": previous_close,
+        "timestamp": int(time.time() * 1000)
+    }
+
+
+HEADLINES = [
+    "{t} beats earnings expectations as revenue climbs",
+    "{t} shares slide after guidance cut",
+    "Analysts upgrade {t} on strong demand outlook",
+    "{t} faces regulatory scrutiny over new product",
+    "{t} announces share buyback program",
+    "Why {t} stock is moving today",
+    "{t} misses estimates, shares fall in late trading",
+    "Investors weigh {t} valuation after rally",
+]
+
+
+def news_entries(ticker: str, count: int = 20):
+    """Google News RSS-like entries (feedparser dicts) for the usual parsing path."""
+    import feedparser
+
+    _simulate_upstream()
+    rng = random.Random(_ticker_seed(ticker))
+    now = datetime.now()
+    entries = []
+    for i in range(count):
+        published = now - timedelta(hours=rng.randint(1, 72))
+        title = rng.choice(HEADLINES).format(t=ticker.upper())
+        entries.append(feedparser.FeedParserDict(
+            title=f"{title} - Stub Wire",
+            link=f"https://example.com/{ticker.lower()}/{i}",
+            published_parsed=published.timetuple(),
+            summary=title
+        ))
+    return entries
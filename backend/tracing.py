@@ -0,0 +1,133 @@
+import contextvars
+import os
+import queue
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+# Lightweight request tracing.
+# Every request gets a trace; span() records named child spans under the current span.
+# Spans are summarised into a Server-Timing header, and if TRACE_EXPORT_URL is set
+# (e.g. http://localhost:9411/api/v2/spans) whole traces are shipped in Zipkin v2 JSON,
+# which Zipkin, Jaeger and the OpenTelemetry collector all accept.
+
+TRACE_EXPORT_URL = os.environ.get("TRACE_EXPORT_URL")
+SERVICE_NAME = "stonks-daily"
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    def __init__(self, trace, name, parent_id=None, tags=None):
+        self.trace = trace
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.tags = tags or {}
+        self.start_wall = time.time()
+        self.start = time.perf_counter()
+        self.duration = None
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.start
+
+    def to_zipkin(self):
+        span = {
+            "traceId": self.trace.trace_id,
+            "id": self.span_id,
+            "name": self.name,
+            "timestamp": int(self.start_wall * 1e6),
+            "duration": max(1, int((self.duration or 0) * 1e6)),
+            "localEndpoint": {"serviceName": SERVICE_NAME},
+            "tags": {k: str(v) for k, v in self.tags.items()},
+        }
+        if self.parent_id:
+            span["parentId"] = self.parent_id
+        return span
+
+
+class Trace:
+    def __init__(self):
+        self.trace_id = secrets.token_hex(16)
+        self.spans = []
+
+    def server_timing(self):
+        """Server-Timing header value: durations summed per span name, in first-seen order."""
+        totals = {}
+        for s in self.spans:
+            if s.parent_id is None or s.duration is None:
+                continue
+            totals[s.name] = totals.get(s.name, 0.0) + s.duration
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items()]
+        root = self.spans[0] if self.spans else None
+        if root is not None and root.duration is not None:
+            entries.append(f"total;dur={root.duration * 1000:.1f}")
+        return ", ".join(entries)
+
+
+@contextmanager
+def span(name, **tags):
+    """Record a span under the current one. No-op outside a traced request."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _current_span.get()
+    s = Span(trace, name, parent.span_id if parent else None, tags)
+    trace.spans.append(s)
+    token = _current_span.set(s)
+    try:
+        yield s
+    finally:
+        s.finish()
+        _current_span.reset(token)
+
+
+@contextmanager
+def start_trace(name, **tags):
+    """Open a new trace with a root span (one per request)."""
+    trace = Trace()
+    trace_token = _current_trace.set(trace)
+    try:
+        with span(name, **tags):
+            yield trace
+    finally:
+        _current_trace.reset(trace_token)
+        if TRACE_EXPORT_URL:
+            _ensure_exporter()
+            try:
+                _export_queue.put_nowait(trace)
+            except queue.Full:
+                pass # Collector is behind; drop rather than block
+
+
+# --- Export (background thread so requests never wait on the collector) ---
+
+_export_queue = queue.Queue(maxsize=1000)
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def _export_worker():
+    session = requests.Session()
+    while True:
+        trace = _export_queue.get()
+        try:
+            spans = [s.to_zipkin() for s in trace.spans if s.duration is not None]
+            session.post(TRACE_EXPORT_URL, json=spans, timeout=2)
+        except Exception as e:
+            print(f"Trace export failed: {e}")
+
+
+def _ensure_exporter():
+    # Started on first use (not at import) so the thread is created in each forked worker
+    global _exporter
+    if _exporter is None or not _exporter.is_alive():
+        with _exporter_lock:
+            if _exporter is None or not _exporter.is_alive():
+                _exporter = threading.Thread(target=_export_worker, name="trace-export", daemon=True)
+                _exporter.start()
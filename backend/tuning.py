@@ -0,0 +1,267 @@
+import contextlib
+import fcntl
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Budgeted hyperparameter search, run in the background so requests never pay for it.
+# successive_halving() samples candidates from a predictor's param_space and scores them with
+# time-series CV on a growing number of the most recent training windows, keeping the best
+# 1/FACTOR each round. TuningService runs searches one at a time on a background thread and
+# keeps the best parameters per (ticker, model_type), which the prediction path passes to
+# get_predictor (and so into the model registry key).
+# Forked workers share TUNED_PARAMS_PATH: results and in-progress searches (<path>.pending)
+# are read-merged-written under a file lock, so a search runs once across workers.
+#   TUNING_ENABLED       1 to schedule searches from prediction requests (default 0)
+#   TUNING_CPU_BUDGET    parallel trials (worker processes) per search, default 1
+#   TUNING_TIME_BUDGET   wall-clock seconds per search; checked between rounds, default 300
+#   TUNING_CANDIDATES    initial candidates per search, default 18
+#   TUNING_MAX_AGE_DAYS  re-tune a (ticker, model_type) after this many days, default 7
+#   TUNED_PARAMS_PATH    where the best parameters are kept (JSON)
+
+ENABLED = os.environ.get("TUNING_ENABLED", "0") == "1"
+CPU_BUDGET = int(os.environ.get("TUNING_CPU_BUDGET", 1))
+TIME_BUDGET = float(os.environ.get("TUNING_TIME_BUDGET", 300))
+CANDIDATES = int(os.environ.get("TUNING_CANDIDATES", 18))
+MAX_AGE = float(os.environ.get("TUNING_MAX_AGE_DAYS", 7)) * 86400
+TUNED_PARAMS_PATH = os.environ.get("TUNED_PARAMS_PATH", os.path.join("model_registry", "tuned_params.json"))
+
+FACTOR = 3 # Keep the best 1/FACTOR of the candidates per round, with FACTOR times the samples
+CV_SPLITS = 3
+MIN_SAMPLES_PER_SPLIT = 20
+
+
+def _cv_score(estimator, x, y, n_splits):
+    # Mean squared error over forward-chaining folds (train on the past, test on what follows)
+    from sklearn.base import clone
+    from sklearn.model_selection import TimeSeriesSplit
+
+    errors = []
+    for train_idx, test_idx in TimeSeriesSplit(n_splits=n_splits).split(x):
+        model = clone(estimator).fit(x[train_idx], y[train_idx])
+        errors.append(np.mean((model.predict(x[test_idx]) - y[test_idx]) ** 2))
+    return float(np.mean(errors))
+
+
+def successive_halving(predictor, x, y, n_candidates=None, time_budget=None, n_jobs=None, seed=42):
+    """
+    Successive-halving search over predictor.param_space.
+    Args:
+        predictor: Predictor whose params are the starting point (its class builds the candidates)
+        x, y: Training windows and targets in time order
+        n_candidates: Initial number of sampled candidates
+        time_budget: Wall-clock seconds; no new round starts once exceeded
+        n_jobs: Candidates evaluated in parallel
+    Returns:
+        dict with the best params, its CV error and a per-round log
+    """
+    from joblib import Parallel, delayed
+    from sklearn.model_selection import ParameterSampler
+
+    n_candidates = n_candidates or CANDIDATES
+    deadline = time.monotonic() + (time_budget or TIME_BUDGET)
+    n_jobs = n_jobs or CPU_BUDGET
+
+    sampled = list(ParameterSampler(predictor.param_space, n_candidates, random_state=seed))
+    # The current params compete too, so tuning never does worse than the defaults on CV
+    current = {k: predictor.params[k] for k in predictor.param_space if k in predictor.params}
+    candidates = [current] + [c for c in sampled if c != current]
+
+    n_samples = len(y)
+    rounds = max(1, math.ceil(math.log(len(candidates), FACTOR)))
+    samples = max(CV_SPLITS * MIN_SAMPLES_PER_SPLIT * 2, n_samples // FACTOR ** (rounds - 1))
+    log = []
+    started = time.monotonic()
+
+    def build(params, n_samples):
+        # Estimators in the search are single-threaded; parallelism is across candidates
+        candidate = type(predictor)(predictor.look_back, n_jobs=1, params={**predictor.params, **params})
+        return candidate.build_estimator(n_samples)
+
+    while True:
+        samples = min(samples, n_samples)
+        # Most recent windows: they resemble what the model will forecast from
+        xs, ys = np.ascontiguousarray(x[-samples:]), y[-samples:]
+        errors = Parallel(n_jobs=n_jobs)(delayed(_cv_score)(build(c, samples), xs, ys, CV_SPLITS) for c in candidates)
+        ranked = sorted(zip(errors, range(len(candidates))))
+        log.append({"candidates": len(candidates), "samples": samples, "best_mse": ranked[0][0]})
+        candidates = [candidates[i] for _, i in ranked[:max(1, math.ceil(len(candidates) / FACTOR))]]
+        best_error = ranked[0][0]
+        if len(candidates) == 1 or samples >= n_samples or time.monotonic() >= deadline:
+            break
+        samples *= FACTOR
+
+    return {
+        "params": candidates[0],
+        "cv_mse": best_error,
+        "rounds": log,
+        "seconds": round(time.monotonic() - started, 3),
+        "timed_out": time.monotonic() >= deadline,
+    }
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json(path, data):
+    # Unique temp file, then an atomic rename: readers never see a partial file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2, default=str)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+        raise
+
+
+class TuningService:
+    def __init__(self, path=TUNED_PARAMS_PATH):
+        self.path = path
+        self.pending_path = f"{path}.pending"
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._executor = None # Created on first use, so each forked worker gets its own thread
+        self._results = _read_json(self.path)
+        self._results_mtime = self._mtime()
+
+    def _mtime(self):
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        # Serializes read-merge-write of the shared files across worker processes
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(f"{self.path}.lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        # Pick up results other workers saved since we last read the file
+        mtime = self._mtime()
+        if mtime != self._results_mtime:
+            results = _read_json(self.path)
+            with self._lock:
+                self._results.update(results)
+                self._results_mtime = mtime
+
+    def _save(self, key, entry):
+        try:
+            with self._file_lock():
+                results = _read_json(self.path)
+                results[key] = entry
+                _write_json(self.path, results)
+            with self._lock:
+                self._results.update(results)
+                self._results_mtime = self._mtime()
+        except OSError as e:
+            print(f"Tuning: could not save {self.path}: {e}")
+
+    def _claim(self, key):
+        """Mark a search as running for all workers; False if another worker runs it already."""
+        try:
+            with self._file_lock():
+                # Another worker may have finished it since we last looked
+                entry = _read_json(self.path).get(key)
+                if entry and time.time() - entry["tuned_at"] < MAX_AGE:
+                    return False
+                pending = _read_json(self.pending_path)
+                started = pending.get(key)
+                # A claim older than twice the budget belongs to a worker that died mid-search
+                if started and time.time() - started < 2 * TIME_BUDGET:
+                    return False
+                pending[key] = time.time()
+                _write_json(self.pending_path, pending)
+        except OSError as e:
+            print(f"Tuning: could not claim {key}: {e}")
+        return True
+
+    def _release(self, key):
+        try:
+            with self._file_lock():
+                pending = _read_json(self.pending_path)
+                if pending.pop(key, None) is not None:
+                    _write_json(self.pending_path, pending)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _key(ticker, model_type):
+        return f"{ticker.upper()}:{model_type}"
+
+    def best_params(self, ticker: str, model_type: str):
+        """Tuned params for get_predictor(params=...), or None if the pair has not been tuned."""
+        self._refresh()
+        entry = self._results.get(self._key(ticker, model_type))
+        return entry["params"] if entry else None
+
+    def status(self, ticker: str = None):
+        self._refresh()
+        with self._lock:
+            pending = sorted(self._pending)
+            results = dict(self._results)
+        if ticker:
+            prefix = f"{ticker.upper()}:"
+            pending = [k for k in pending if k.startswith(prefix)]
+            results = {k: v for k, v in results.items() if k.startswith(prefix)}
+        return {"enabled": ENABLED, "pending": pending, "results": results}
+
+    def schedule(self, ticker: str, model_type: str, data):
+        """Queue a background search unless one is pending or a recent result exists."""
+        from backend.model import get_predictor
+
+        if not ENABLED or not get_predictor(model_type).param_space:
+            return False
+        key = self._key(ticker, model_type)
+        self._refresh()
+        with self._lock:
+            entry = self._results.get(key)
+            if key in self._pending or (entry and time.time() - entry["tuned_at"] < MAX_AGE):
+                return False
+            self._pending.add(key)
+        if not self._claim(key):
+            with self._lock:
+                self._pending.discard(key)
+            return False
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tuning")
+        self._executor.submit(self._run, key, model_type, data)
+        return True
+
+    def _run(self, key, model_type, data):
+        from backend.model import get_predictor
+
+        try:
+            predictor = get_predictor(model_type)
+            x_train, y_train, _ = predictor.prepare_data_sklearn(data)
+            result = predictor.tune_hyperparameters(x_train, y_train)
+            self._save(key, {**result, "tuned_at": time.time(), "samples": len(y_train)})
+            print(f"Tuning {key}: {result['params']} (cv mse {result['cv_mse']:.6f}, {result['seconds']}s)")
+        except Exception as e:
+            print(f"Tuning {key} failed: {e}")
+        finally:
+            self._release(key)
+            with self._lock:
+                self._pending.discard(key)
+
+
+tuning_service = TuningService()
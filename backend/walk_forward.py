@@ -0,0 +1,133 @@
+import math
+import time
+
+import numpy as np
+
+from backend.executor import CPU_BUDGET
+
+# Walk-forward backtesting: instead of one 80/20 split, the test period is cut into folds of
+# `retrain_every` bars. Each fold retrains on the history before it and predicts its bars,
+# so every prediction is out of sample and the model is as fresh as it would be in production.
+#   expanding  each fold trains on all rows before it
+#   rolling    each fold trains on the `train_window` rows before it
+# Folds are independent, so they run in parallel worker processes. They all read one frame
+# holding just the columns predictors use; its numeric block is a single float array that
+# joblib dumps once and memory-maps for the workers instead of pickling a copy per fold.
+# joblib only memory-maps arrays above max_nbytes (1M by default, while a 2y daily frame is
+# ~40 KB), so the threshold is lowered to MEMMAP_MIN_BYTES.
+
+MODES = ("expanding", "rolling")
+INITIAL_TRAIN = 0.5 # Share of the history before the first fold
+MIN_TRAIN_WINDOWS = 60 # Training windows a fold needs beyond look_back
+MEMMAP_MIN_BYTES = "1K" # Arrays larger than this are memory-mapped into fold workers
+
+
+def plan_folds(n_rows, look_back, mode="expanding", retrain_every=20, initial_train=INITIAL_TRAIN, train_window=None):
+    """
+    (train_start, test_start, test_end) row ranges for every fold.
+    Args:
+        n_rows: Length of the history
+        look_back: Window length of the predictor
+        mode: 'expanding' or 'rolling'
+        retrain_every: Bars per fold (how often the model is retrained)
+        initial_train: Share of the history used for training before the first fold
+        train_window: Training rows per fold in rolling mode (default: the initial training size)
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown walk-forward mode: {mode}")
+    first_test = max(int(n_rows * initial_train), look_back + MIN_TRAIN_WINDOWS)
+    if first_test >= n_rows:
+        raise ValueError("Data too small for look_back window and walk-forward split")
+    train_window = max(train_window or first_test, look_back + MIN_TRAIN_WINDOWS)
+    retrain_every = max(1, retrain_every)
+
+    folds = []
+    for test_start in range(first_test, n_rows, retrain_every):
+        train_start = 0 if mode == "expanding" else max(0, test_start - train_window)
+        folds.append((train_start, test_start, min(n_rows, test_start + retrain_every)))
+    return folds
+
+
+def _run_fold(model_type, look_back, params, frame, fold):
+    from backend.model import get_predictor
+
+    start = time.perf_counter()
+    # Single-threaded estimators: the parallelism is across folds
+    predictor = get_predictor(model_type, look_back=look_back, n_jobs=1, params=params)
+    predicted = predictor.walk_forward_fold(frame, *fold)
+    return np.asarray(predicted, dtype=float), time.perf_counter() - start
+
+
+def error_metrics(actual, predicted):
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score, mean_absolute_percentage_error
+
+    metrics = {
+        "mae": mean_absolute_error(actual, predicted),
+        "rmse": math.sqrt(mean_squared_error(actual, predicted)),
+        "mape": mean_absolute_percentage_error(actual, predicted),
+    }
+    if len(actual) > 1:
+        metrics["r2"] = r2_score(actual, predicted)
+        # Share of days where the predicted move (vs the previous actual close) has the right sign
+        metrics["direction_accuracy"] = float(np.mean(
+            np.sign(predicted[1:] - actual[:-1]) == np.sign(actual[1:] - actual[:-1])
+        ))
+    return metrics
+
+
+def walk_forward_backtest(model_type, data, mode="expanding", retrain_every=20, train_window=None,
+                          initial_train=INITIAL_TRAIN, n_jobs=None, params=None, look_back=60):
+    """
+    Walk-forward backtest of one model type.
+    Returns:
+        { dates, actual, predicted, metrics, folds, feature_importance }, like Predictor.backtest,
+        with per-fold metrics under 'folds'
+    """
+    from joblib import Parallel, delayed
+    from backend.model import get_predictor, risk_metrics
+
+    feature_columns = get_predictor(model_type, look_back=look_back).feature_columns
+    frame = data[['Date'] + feature_columns].reset_index(drop=True)
+    folds = plan_folds(len(frame), look_back, mode, retrain_every, initial_train, train_window)
+
+    n_jobs = n_jobs if n_jobs and n_jobs > 0 else CPU_BUDGET
+    outputs = Parallel(n_jobs=min(n_jobs, len(folds)), max_nbytes=MEMMAP_MIN_BYTES)(
+        delayed(_run_fold)(model_type, look_back, params, frame, fold) for fold in folds
+    )
+
+    closes = frame['Close'].values
+    dates = frame['Date'].values
+    fold_reports = []
+    for (train_start, test_start, test_end), (predicted, seconds) in zip(folds, outputs):
+        fold_reports.append({
+            "train_start": str(dates[train_start]),
+            "train_end": str(dates[test_start - 1]),
+            "test_start": str(dates[test_start]),
+            "test_end": str(dates[test_end - 1]),
+            "train_rows": test_start - train_start,
+            "test_rows": test_end - test_start,
+            "seconds": round(seconds, 4),
+            **error_metrics(closes[test_start:test_end], predicted),
+        })
+
+    first_test = folds[0][1]
+    actual = closes[first_test:]
+    predicted = np.concatenate([p for p, _ in outputs])
+    fold_mae = [f["mae"] for f in fold_reports]
+    metrics = {
+        **error_metrics(actual, predicted),
+        **risk_metrics(predicted),
+        "mode": mode,
+        "retrain_every": retrain_every,
+        "folds": len(folds),
+        "fold_mae_mean": float(np.mean(fold_mae)),
+        "fold_mae_std": float(np.std(fold_mae)),
+    }
+    return {
+        "dates": dates[first_test:],
+        "actual": actual,
+        "predicted": predicted,
+        "metrics": metrics,
+        "folds": fold_reports,
+        "feature_importance": {},
+    }
@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+import httpx
+from cachetools import TTLCache
+
+# Caching proxy for query1.finance.yahoo.com (Market Overview & Trending services).
+# - per-path TTL cache of successful (2xx) responses, with stale copies kept around for
+#   serving on upstream errors (5xx, 429 rate limiting, timeouts)
+# - other 4xx answers (e.g. unknown symbol) are passed through with their status, uncached
+# - identical in-flight paths are coalesced onto a single upstream request
+# - one pooled async client with strict timeouts
+
+YAHOO_BASE_URL = "https://query1.finance.yahoo.com"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# TTL (seconds) by path prefix; first match wins
+PATH_TTLS = [
+    ("v8/finance/chart", 30),
+    ("v7/finance/quote", 15),
+    ("v1/finance/trending", 300),
+    ("v1/finance/search", 3600),
+]
+DEFAULT_TTL = 60
+# How long an expired response may still be served if Yahoo is failing
+STALE_TTL = 3600
+
+TIMEOUT = httpx.Timeout(5.0, connect=2.0)
+LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+
+
+class UpstreamError(Exception):
+    pass
+
+
+class YahooProxy:
+    def __init__(self, base_url=YAHOO_BASE_URL, maxsize=1000):
+        self.base_url = base_url
+        # key -> (fetched_at, (status, payload)); entries live for STALE_TTL, freshness is checked per path
+        self.cache = TTLCache(maxsize=maxsize, ttl=STALE_TTL)
+        self.inflight = {}
+        self.client = None
+
+    def _get_client(self):
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"User-Agent": USER_AGENT},
+                timeout=TIMEOUT,
+                limits=LIMITS,
+            )
+        return self.client
+
+    @staticmethod
+    def ttl_for(path: str):
+        for prefix, ttl in PATH_TTLS:
+            if path.startswith(prefix):
+                return ttl
+        return DEFAULT_TTL
+
+    async def get(self, path: str, query: str = ""):
+        """(status_code, payload) for a Yahoo path, from the cache when fresh."""
+        key = f"{path}?{query}" if query else path
+        cached = self.cache.get(key)
+        if cached and time.monotonic() - cached[0] < self.ttl_for(path):
+            return cached[1]
+
+        # Coalesce identical requests already on their way upstream
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key))
+            self.inflight[key] = task
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+
+        try:
+            return await asyncio.shield(task)
+        except Exception as e:
+            if cached:
+                print(f"Proxy Error (serving stale {key}): {e}")
+                return cached[1]
+            raise UpstreamError(str(e))
+
+    async def _fetch(self, key: str):
+        resp = await self._get_client().get(f"/{key}")
+        # Server errors and rate limiting fall back to the stale copy
+        if resp.status_code >= 500 or resp.status_code == 429:
+            resp.raise_for_status()
+        try:
+            payload = resp.json()
+        except ValueError:
+            if resp.is_success:
+                raise UpstreamError(f"Non-JSON response for {key}")
+            payload = {"error": resp.text[:500]}
+        result = (resp.status_code, payload)
+        # Only successful answers are cached: a 4xx must not replace a good copy for the TTL
+        if resp.is_success:
+            self.cache[key] = (time.monotonic(), result)
+        return result
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+
+yahoo_proxy = YahooProxy()
@@ -14,6 +14,8 @@ export interface SimulationRequest {
     simulation_method?: string;
     drift_adj?: number;
     volatility_adj?: number;
+    max_points?: number; // Point budget per series, e.g. chart width in pixels
+    max_paths?: number; // Paths returned for the fan chart (server default 100)
 }
 
 export interface BacktestRequest {
@@ -23,6 +25,9 @@ export interface BacktestRequest {
     strategy?: string;
     model_type?: string;
     commission?: number;
+    backtest_mode?: 'split' | 'expanding' | 'rolling'; // Walk-forward modes retrain every `retrain_every` bars
+    retrain_every?: number;
+    train_window?: number; // Rolling mode: training bars per fold
 }
 
 export const apiClient = {
@@ -2,4 +2,8 @@
 # Render startup script for Terminal Pro Backend
 
 # Start the FastAPI application with Uvicorn
+# With WEB_CONCURRENCY > 1, use the preforked server so workers share warm state copy-on-write
+if [ "${WEB_CONCURRENCY:-1}" -gt 1 ]; then
+    exec python -m backend.serve
+fi
 uvicorn backend.main:app --host 0.0.0.0 --port ${PORT:-8000}